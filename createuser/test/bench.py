@@ -0,0 +1,170 @@
+"""
+Benchmark end-to-end createuser.py terhadap fake_cpanel (tanpa cPanel asli).
+
+Untuk tiap kombinasi backend x concurrency: server palsu di-reset, createuser.py dijalankan
+sebagai subprocess (env sama seperti pemakaian normal), lalu metrics.json-nya dibaca:
+akun/menit, p50/p95 per stage, status, dan statistik server (429, peak in-flight).
+
+    python test/bench.py --backends uapi --concurrency 1,4,8 --count 200 --latency-ms 20
+    python test/bench.py ... --save-baseline bench_baseline.json     # simpan acuan
+    python test/bench.py ... --baseline bench_baseline.json          # exit 1 kalau regresi
+
+Backend selenium butuh SELENIUM_URL dan browser harus bisa menjangkau server palsu:
+di docker compose pakai --public-host createuser (nama service).
+"""
+import argparse, json, os, subprocess, sys, time
+
+from fake_cpanel import FakeCpanel
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(HERE, "createuser.py")
+
+# ========= RUN =========
+def run_case(fake: FakeCpanel, backend: str, conc: int, args) -> dict:
+    """Satu skenario: reset server, jalankan createuser.py, kumpulkan metrics."""
+    fake.reset()
+    fake.busy_rate, fake.error_rate = args.busy_rate, args.error_rate
+    name = f"{backend}_{args.engine}_c{conc}"
+    prefix = os.path.join(args.out, name)
+    env = dict(os.environ)
+    env.update({
+        "CPANEL_URL": fake.url(args.public_host),
+        "CPANEL_USER": fake.user,
+        "CPANEL_PASS": fake.password,
+        "DOMAIN": fake.domains[0],
+        "EMAIL_PREFIX": "bench",
+        "START": "1",
+        "COUNT": str(args.count),
+        "BACKEND": backend,
+        "ENGINE": args.engine,
+        "WORKERS": str(conc),
+        "ASYNC_START": str(min(conc, 2)),
+        "ASYNC_MAX": str(conc),
+        "METRICS_PREFIX": prefix,
+        "JOURNAL_FILE": prefix + "_journal.jsonl",
+        "RESULTS_FILE": "",  # jangan tambah baris (password plaintext) ke results.csv asli
+        "SESSION_CACHE": "",
+        "RESUME": "0",
+        "DIAG": "off",
+    })
+    if os.path.exists(env["JOURNAL_FILE"]):
+        os.remove(env["JOURNAL_FILE"])
+    t0 = time.time()
+    with open(prefix + ".log", "w", encoding="utf-8") as out:
+        rc = subprocess.run([sys.executable, SCRIPT], env=env, stdout=out, stderr=subprocess.STDOUT,
+                            timeout=args.timeout).returncode
+    wall = time.time() - t0
+    try:
+        with open(prefix + ".json", encoding="utf-8") as fh:
+            rep = json.load(fh)
+    except (OSError, ValueError):
+        rep = {"accounts": 0, "accounts_per_min": 0.0, "statuses": {}, "stages": {}}
+    return {
+        "case": name,
+        "backend": backend,
+        "engine": args.engine,
+        "concurrency": conc,
+        "exit_code": rc,
+        "wall_s": round(wall, 2),
+        "accounts": rep["accounts"],
+        "accounts_per_min": rep["accounts_per_min"],
+        "statuses": rep["statuses"],
+        "stages": {k: {"p50": v["p50"], "p95": v["p95"], "count": v["count"]} for k, v in rep["stages"].items()},
+        "server": dict(fake.stats),
+    }
+
+# ========= LAPORAN =========
+def print_table(rows):
+    print(f"\n{'case':<26}{'akun':>6}{'akun/min':>11}{'p50 akun':>10}{'p95 akun':>10}{'429':>6}{'peak':>6}  status")
+    for r in rows:
+        tot = r["stages"].get("account_total", {})
+        print(f"{r['case']:<26}{r['accounts']:>6}{r['accounts_per_min']:>11.1f}"
+              f"{tot.get('p50', 0):>10.3f}{tot.get('p95', 0):>10.3f}"
+              f"{r['server'].get('http_429', 0):>6}{r['server'].get('peak_inflight', 0):>6}  {r['statuses']}")
+    for r in rows:
+        print(f"\n[{r['case']}] p50/p95 per stage (detik)")
+        for name, st in sorted(r["stages"].items()):
+            print(f"  {name:<28}{st['p50']:>9.3f}{st['p95']:>9.3f}  n={st['count']}")
+
+def compare(rows, baseline: dict, tol: float) -> list:
+    """Bandingkan dengan baseline; return daftar regresi (akun/menit turun > tol, p95 stage naik > tol)."""
+    base = {b["case"]: b for b in baseline.get("results", [])}
+    bad = []
+    for r in rows:
+        b = base.get(r["case"])
+        if b is None:
+            print(f"[{r['case']}] tidak ada di baseline, dilewati.")
+            continue
+        delta = (r["accounts_per_min"] - b["accounts_per_min"]) / (b["accounts_per_min"] or 1)
+        print(f"[{r['case']}] akun/menit {b['accounts_per_min']:.1f} -> {r['accounts_per_min']:.1f} ({delta:+.1%})")
+        if delta < -tol:
+            bad.append(f"{r['case']}: akun/menit turun {delta:+.1%}")
+        for name, st in r["stages"].items():
+            old = (b.get("stages") or {}).get(name)
+            if old and old["p95"] > 0 and st["p95"] > old["p95"] * (1 + tol):
+                print(f"  p95 {name}: {old['p95']:.3f} -> {st['p95']:.3f}")
+                bad.append(f"{r['case']}: p95 {name} naik {old['p95']:.3f} -> {st['p95']:.3f}s")
+    return bad
+
+# ========= MAIN =========
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark createuser.py terhadap fake cPanel.")
+    ap.add_argument("--backends", default="uapi", help="dipisah koma: uapi,selenium")
+    ap.add_argument("--concurrency", default="1,4", help="WORKERS (threads) / ASYNC_MAX (async), dipisah koma")
+    ap.add_argument("--engine", default="threads", choices=("threads", "async"))
+    ap.add_argument("--count", type=int, default=100)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--jitter-ms", type=float, default=10.0)
+    ap.add_argument("--busy-rate", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--form-delay-ms", type=int, default=150)
+    ap.add_argument("--public-host", default="127.0.0.1", help="host server palsu yang dilihat browser Selenium")
+    ap.add_argument("--out", default=os.path.join("/app/debug", "bench"))
+    ap.add_argument("--timeout", type=float, default=1800, help="batas waktu per skenario (detik)")
+    ap.add_argument("--baseline", help="bench JSON acuan; exit 1 kalau akun/menit turun atau p95 stage naik "
+                                       "lebih dari --tolerance")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    ap.add_argument("--save-baseline", help="simpan hasil run ini sebagai baseline")
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    bind = "127.0.0.1" if args.public_host in ("127.0.0.1", "localhost") else "0.0.0.0"
+    fake = FakeCpanel(host=bind, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      form_delay_ms=args.form_delay_ms).start()
+    print(f"Fake cPanel: {fake.url(args.public_host)}")
+    rows = []
+    try:
+        for backend in args.backends.split(","):
+            for conc in (int(c) for c in args.concurrency.split(",")):
+                print(f"Jalankan {backend} / {args.engine} / concurrency={conc} / {args.count} akun…", flush=True)
+                rows.append(run_case(fake, backend.strip(), conc, args))
+    finally:
+        fake.stop()
+
+    print_table(rows)
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline")},
+        "results": rows,
+    }
+    with open(os.path.join(args.out, "bench.json"), "w", encoding="utf-8") as fh:
+        json.dump(result, fh, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+        print(f"\nBaseline disimpan: {args.save_baseline}")
+
+    failed = [r["case"] for r in rows if r["exit_code"] != 0]
+    if failed:
+        print(f"\nSkenario gagal (exit != 0): {failed} — lihat log di {args.out}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            bad = compare(rows, json.load(fh), args.tolerance)
+        if bad:
+            print("\nREGRESI:\n  " + "\n  ".join(bad))
+            sys.exit(1)
+        print("\nTidak ada regresi dibanding baseline.")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,64 @@
-import os, re, time, sys, string, logging
+from __future__ import annotations
+
+import os, re, io, time, sys, string, logging, queue, threading, json, hashlib, csv, math, asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from secrets import choice as schoice
-from contextlib import contextmanager
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import (
-    TimeoutException,
-    StaleElementReferenceException,
-    NoSuchElementException,
-    ElementClickInterceptedException,
-)
-from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.common.action_chains import ActionChains
+from contextlib import contextmanager, nullcontext
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ========= SELENIUM (LAZY) =========
+# Selenium baru di-import saat browser pertama dibuka (_load_selenium), jadi jalur
+# HTTP-only (BACKEND=uapi + login HTTP) dan dry-run tidak membayar ~0.3s import-nya.
+class _SeleniumNotLoaded(Exception):
+    """Placeholder exception selenium sebelum di-load (tidak pernah di-raise)."""
+
+webdriver = By = Keys = WebDriverWait = EC = WebElement = ActionChains = None
+TimeoutException = StaleElementReferenceException = _SeleniumNotLoaded
+NoSuchElementException = ElementClickInterceptedException = _SeleniumNotLoaded
+
+def _load_selenium():
+    global webdriver, By, Keys, WebDriverWait, EC, WebElement, ActionChains
+    global TimeoutException, StaleElementReferenceException, NoSuchElementException, ElementClickInterceptedException
+    if webdriver is not None:
+        return
+    from selenium import webdriver as _webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import (
+        TimeoutException,
+        StaleElementReferenceException,
+        NoSuchElementException,
+        ElementClickInterceptedException,
+    )
+    from selenium.webdriver.remote.webelement import WebElement
+    from selenium.webdriver.common.action_chains import ActionChains
+    webdriver = _webdriver
 
 # ========= LOGGING =========
-LOG_DIR = "/app/debug"
-os.makedirs(LOG_DIR, exist_ok=True)
-log_file = os.path.join(LOG_DIR, "createuser.log")
-
-handlers = [
-    logging.StreamHandler(sys.stdout),
-    logging.FileHandler(log_file, encoding="utf-8"),
-]
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=handlers,
-)
+LOG_DIR = os.getenv("LOG_DIR", "/app/debug")
 log = logging.getLogger("createuser")
 
+def setup_logging():
+    """Handler stdout + file log; dipanggil dari main(), bukan saat import."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler(os.path.join(LOG_DIR, "createuser.log"), encoding="utf-8"),
+        ],
+    )
+
 # ========= ENV =========
 CPANEL_URL   = os.getenv("CPANEL_URL", "https://cpanel.example.com")
 CPANEL_USER  = os.getenv("CPANEL_USER")
@@ -39,16 +66,109 @@ CPANEL_PASS  = os.getenv("CPANEL_PASS")
 
 DOMAIN       = os.getenv("DOMAIN", "")             # contoh: "mbtech.info" (kosong = pakai default di UI)
 EMAIL_PREFIX = os.getenv("EMAIL_PREFIX", "akun")   # akun -> akun001, akun002, ...
+START        = int(os.getenv("START", "1"))        # index awal (START=101 -> akun101, ...)
 COUNT        = int(os.getenv("COUNT", "3"))        # jumlah akun yang dibuat
-#PASSWORD_STATIC = os.getenv("PASSWORD_STATIC", "") # kalau kosong → generate acak
-PASSWORD_STATIC = "@MBtech123" # kalau kosong → generate acak
+QUOTA_MB     = int(os.getenv("QUOTA_MB", "0"))     # kuota mailbox (MB), 0 = unlimited
+MANIFEST     = os.getenv("MANIFEST", "")           # CSV/JSONL: local,domain,quota,password,welcome (ganti PREFIX+index)
+MANIFEST_CHUNK = int(os.getenv("MANIFEST_CHUNK", "1000"))  # baris per jendela pengelompokan domain
+PASSWORD_STATIC = os.getenv("PASSWORD_STATIC", "") # kalau kosong → generate acak
+NEW_PASSWORD = os.getenv("NEW_PASSWORD", "")       # OPERATION=passwd: password baru (kosong → acak per akun)
+BACKEND      = os.getenv("BACKEND", "selenium").lower()  # selenium | uapi (HTTP langsung, browser hanya untuk login)
+OPERATION    = os.getenv("OPERATION", "create").lower()  # create | delete | passwd | quota
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+WORKERS      = max(1, int(os.getenv("WORKERS", "1")))  # jumlah sesi paralel (tiap worker login sendiri)
+SELENIUM_URL = os.getenv("SELENIUM_URL", "http://s-chromium:4444")
+SELENIUM_URLS = os.getenv("SELENIUM_URLS", SELENIUM_URL).replace(",", " ").split()  # node grid, bergiliran per browser
+TARGETS      = os.getenv("TARGETS", "")                # JSON/JSONL: banyak akun cPanel + job masing-masing
+HOST_LIMIT   = int(os.getenv("HOST_LIMIT", "0"))       # akun in-flight maksimum per host cPanel (0 = workers terbesar di host itu)
+POOL_WORKERS = int(os.getenv("POOL_WORKERS", "0"))     # total worker semua host, dibagi per host (0 = tanpa batas)
+HEADLESS     = os.getenv("HEADLESS", "1") == "1"       # 0 = tampilkan browser (debug lewat VNC :7900)
+BLOCK_IMAGES = os.getenv("BLOCK_IMAGES", "1") == "1"   # gambar tidak pernah dibaca otomasi
+BLOCK_FONTS  = os.getenv("BLOCK_FONTS", "1") == "1"    # web font (ikon) juga tidak
+PAGE_LOAD_STRATEGY = os.getenv("PAGE_LOAD_STRATEGY", "eager")  # eager (DOM siap) | normal | none
+CHROME_ARGS  = os.getenv("CHROME_ARGS", "--disable-dev-shm-usage --disable-extensions")  # flag tambahan, spasi
+ENGINE       = os.getenv("ENGINE", "threads").lower()  # threads (WORKERS tetap) | async (concurrency adaptif)
+ASYNC_START  = int(os.getenv("ASYNC_START", "2"))      # limit in-flight awal engine async
+ASYNC_MAX    = int(os.getenv("ASYNC_MAX", "16"))       # batas atas in-flight engine async
+ASYNC_SLOW_MS = int(os.getenv("ASYNC_SLOW_MS", "3000" if BACKEND == "uapi" else "20000"))  # lebih lambat = server kewalahan
+BUSY_RETRIES = int(os.getenv("BUSY_RETRIES", "5"))     # berapa kali akun diulang setelah 429/5xx
+RETRY_BUDGET = int(os.getenv("RETRY_BUDGET", "100"))   # total retry untuk seluruh batch (semua kategori)
+REGEN_FILE   = os.getenv("REGEN_FILE", os.path.join(LOG_DIR, "regenerated_passwords.csv"))  # password pengganti
+SESSION_LOGIN = os.getenv("SESSION_LOGIN", "http").lower()  # http (login_only=1, fallback browser) | browser
+SESSION_CACHE = os.getenv("SESSION_CACHE", os.path.join(LOG_DIR, "session.json"))  # kosong = tanpa cache disk
+SESSION_TTL  = int(os.getenv("SESSION_TTL", "1800"))   # umur maksimum sesi cache (detik)
+VERIFY       = os.getenv("VERIFY", "bulk").lower()     # bulk (1x ambil daftar akun) | row (cek tabel per akun)
+VERIFY_EVERY = int(os.getenv("VERIFY_EVERY", "0"))     # verifikasi bulk tiap K akun (0 = di akhir batch)
+REUSE_FORM   = os.getenv("REUSE_FORM", "1") == "1"     # pakai ulang form Create yg sudah ter-load (stay on page)
+PIPELINE     = int(os.getenv("PIPELINE", "0"))         # selenium: add_pop in-flight per browser via fetch (0 = form)
+FAST_FILL    = os.getenv("FAST_FILL", "1") == "1"      # isi form via satu execute_script (fallback per-field)
+READY_STABLE_MS = int(os.getenv("READY_STABLE_MS", "250"))  # tombol Create harus stabil enabled selama ini
+PREFLIGHT    = os.getenv("PREFLIGHT", "1") == "1"      # skip akun yang sudah ada sebelum buka form
+JOURNAL_FILE = os.getenv("JOURNAL_FILE", os.path.join(LOG_DIR, "journal.jsonl"))
+RESUME       = os.getenv("RESUME", "0") == "1"         # hanya ulangi akun yang belum final di journal
+PLAN         = os.getenv("PLAN", "0") == "1"           # dry run: hitung rencana create/skip/konflik, tidak mengubah server
+PLAN_FILE    = os.getenv("PLAN_FILE", os.path.join(LOG_DIR, "plan.csv"))  # rencana per akun (email,action,reason)
+RESULTS_FILE = os.getenv("RESULTS_FILE", os.path.join(LOG_DIR, "results.csv"))  # .csv | .jsonl | .enc; kosong = off
+RESULTS_KEY  = os.getenv("RESULTS_KEY", "")            # kunci Fernet untuk RESULTS_FILE .enc
+RESULTS_BATCH = int(os.getenv("RESULTS_BATCH", "200"))  # fsync tiap N baris ...
+RESULTS_FLUSH_SEC = float(os.getenv("RESULTS_FLUSH_SEC", "2"))  # ... atau tiap N detik (mana yang duluan)
+RESULTS_PER_WORKER = os.getenv("RESULTS_PER_WORKER", "0") == "1"  # satu file part per worker, digabung di akhir
+DIAG_LEVEL   = os.getenv("DIAG", "failures").lower()  # off | failures | sample:N | always
+DIAG_RING    = int(os.getenv("DIAG_RING", "20"))        # snapshot terakhir per worker yg disimpan saat gagal
+DIAG_MAX_MB  = float(os.getenv("DIAG_MAX_MB", "200"))   # batas total ukuran folder diag
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", os.path.join(LOG_DIR, "metrics"))  # -> metrics.json/.csv
+METRICS_PROM = os.getenv("METRICS_PROM", "0") == "1"   # tulis juga metrics.prom (Prometheus text)
+
+# ========= STATUS =========
+OK, DUPLICATE, UNKNOWN = "OK", "DUPLICATE", "UNKNOWN"
+PENDING = "PENDING"  # submit terkonfirmasi, menunggu verifikasi bulk
+INFLIGHT = "INFLIGHT"  # submit pipeline terkirim, status menyusul dari respons (backend.resolved())
+SKIPPED = "SKIPPED"  # sudah ada di server sebelum batch (preflight), tidak disentuh
+REJECTED = "REJECTED"  # ditolak server secara pasti (kuota penuh, password ditolak); tidak diulang
+FINAL_STATUSES = (OK, DUPLICATE, SKIPPED)  # tidak perlu diulang saat RESUME
+DUP_RE = re.compile(r"already exists|sudah ada|duplicate", re.I)
 
 # ========= UTIL =========
 ALPH = string.ascii_letters + string.digits + "!@#$%^&*()-_=+"
 def gen_pass(n=14): return "".join(schoice(ALPH) for _ in range(n))
 
+def new_password(explicit="") -> str:
+    """
+    Password untuk akun: dari manifest kalau ada, lalu env, selain itu acak per akun.
+    passwd memakai NEW_PASSWORD, bukan PASSWORD_STATIC (= password saat create),
+    supaya rotasi benar-benar mengganti password.
+    """
+    return explicit or (NEW_PASSWORD if OPERATION == "passwd" else PASSWORD_STATIC) or gen_pass()
+
 def waitx(driver, sec=25): return WebDriverWait(driver, sec)
 
+def _now_iso(ts=None) -> str:
+    return datetime.fromtimestamp(ts or time.time(), timezone.utc).isoformat(timespec="seconds")
+
+def _open_private(path: str, mode="a"):
+    """Buka file berisi rahasia (password, cookie sesi): chmod 600, mode file lama ikut diperketat."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | (os.O_APPEND if mode == "a" else os.O_TRUNC), 0o600)
+    os.fchmod(fd, 0o600)
+    return os.fdopen(fd, mode, newline="", encoding="utf-8")
+
+@dataclass
+class Account:
+    """Satu mailbox yang akan diproses batch."""
+    local: str
+    domain: str
+    password: str
+    index: int = 0
+    quota_mb: int = 0          # 0 = unlimited
+    send_welcome: bool = True
+    attempt: int = 1
+    busy_retries: int = 0
+    started: float = 0.0
+    retries: Counter = field(default_factory=Counter)  # retry per kategori kegagalan
+
+    @property
+    def email(self) -> str:
+        return f"{self.local}@{self.domain}" if self.domain else self.local
+
 def _text_of(el: WebElement) -> str:
     try:
         return (el.text or "").strip()
@@ -82,6 +202,281 @@ def try_all_frames(driver):
             continue
     driver.switch_to.default_content()
 
+# ========= METRICS =========
+def _percentile(sorted_vals, q):
+    """Nearest-rank percentile dari list yang sudah terurut."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+class Metrics:
+    """
+    Span latency per stage pipeline (per akun) + counter kejadian (retry, klik JS paksa, ...).
+    Thread-safe; stage yang sedang jalan dicatat ke akun aktif milik thread tsb.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.spans = defaultdict(list)    # stage -> [detik]
+        self.counters = Counter()
+        self.accounts = {}                # email -> {status, total, stages}
+        self.t0 = time.time()
+
+    @contextmanager
+    def stage(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t
+            with self.lock:
+                self.spans[name].append(dt)
+            cur = getattr(self.local, "stages", None)
+            if cur is not None:
+                cur[name] = cur.get(name, 0.0) + dt
+
+    def observe(self, name: str, seconds: float, acct: "Account" = None):
+        """Catat span yang diukur di luar thread akun (mis. respons pipeline yang datang belakangan)."""
+        with self.lock:
+            self.spans[name].append(seconds)
+            rec = self.accounts.get(acct.email) if acct is not None else None
+            if rec is not None:
+                rec["stages"][name] = rec["stages"].get(name, 0.0) + seconds
+
+    def incr(self, name: str, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def begin(self):
+        self.local.stages = {}
+        self.local.t = time.perf_counter()
+
+    def end(self, acct: Account, status: str):
+        stages = getattr(self.local, "stages", None) or {}
+        total = time.perf_counter() - getattr(self.local, "t", time.perf_counter())
+        self.local.stages = None
+        with self.lock:
+            self.spans["account_total"].append(total)
+            self.accounts[acct.email] = {"status": status, "total": total, "stages": stages}
+
+    def set_status(self, acct: Account, status: str):
+        with self.lock:
+            if acct.email in self.accounts:
+                self.accounts[acct.email]["status"] = status
+
+    def report(self) -> dict:
+        with self.lock:
+            elapsed = time.time() - self.t0
+            stages = {}
+            for name, vals in sorted(self.spans.items()):
+                sv = sorted(vals)
+                stages[name] = {
+                    "count": len(sv),
+                    "p50": round(_percentile(sv, 50), 4),
+                    "p95": round(_percentile(sv, 95), 4),
+                    "p99": round(_percentile(sv, 99), 4),
+                    "mean": round(sum(sv) / len(sv), 4),
+                    "max": round(sv[-1], 4),
+                }
+            n = len(self.accounts)
+            return {
+                "started": _now_iso(self.t0),
+                "elapsed_s": round(elapsed, 2),
+                "accounts": n,
+                "accounts_per_min": round(n / elapsed * 60, 2) if elapsed > 0 else 0.0,
+                "statuses": dict(Counter(a["status"] for a in self.accounts.values())),
+                "counters": dict(self.counters),
+                "stages": stages,
+            }
+
+    def write(self, prefix: str, prom=False) -> dict:
+        """
+        Tulis <prefix>.json (ringkasan + p50/p95/p99 per stage), <prefix>.csv (per stage),
+        <prefix>_accounts.csv (span per akun) dan opsional <prefix>.prom (Prometheus text).
+        """
+        rep = self.report()
+        with open(prefix + ".json", "w", encoding="utf-8") as fh:
+            json.dump(rep, fh, indent=2)
+        cols = ["count", "p50", "p95", "p99", "mean", "max"]
+        with open(prefix + ".csv", "w", newline="", encoding="utf-8") as fh:
+            w = csv.writer(fh)
+            w.writerow(["stage"] + cols)
+            for name, st in rep["stages"].items():
+                w.writerow([name] + [st[c] for c in cols])
+        with self.lock:
+            names = sorted({k for a in self.accounts.values() for k in a["stages"]})
+            with open(prefix + "_accounts.csv", "w", newline="", encoding="utf-8") as fh:
+                w = csv.writer(fh)
+                w.writerow(["email", "status", "total"] + names)
+                for email, a in self.accounts.items():
+                    w.writerow([email, a["status"], round(a["total"], 4)]
+                               + [round(a["stages"].get(k, 0.0), 4) for k in names])
+        if prom:
+            with open(prefix + ".prom", "w", encoding="utf-8") as fh:
+                fh.write(self.prometheus(rep))
+        return rep
+
+    @staticmethod
+    def prometheus(rep: dict) -> str:
+        out = [
+            "# HELP createuser_stage_seconds Latency per stage pipeline create.",
+            "# TYPE createuser_stage_seconds summary",
+        ]
+        for name, st in rep["stages"].items():
+            for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                out.append(f'createuser_stage_seconds{{stage="{name}",quantile="{q}"}} {st[key]}')
+            out.append(f'createuser_stage_seconds_count{{stage="{name}"}} {st["count"]}')
+            out.append(f'createuser_stage_seconds_sum{{stage="{name}"}} {round(st["mean"] * st["count"], 4)}')
+        out += ["# TYPE createuser_events_total counter"]
+        for name, n in sorted(rep["counters"].items()):
+            out.append(f'createuser_events_total{{event="{name}"}} {n}')
+        out += ["# TYPE createuser_accounts_total counter"]
+        for status, n in sorted(rep["statuses"].items()):
+            out.append(f'createuser_accounts_total{{status="{status}"}} {n}')
+        out += ["# TYPE createuser_accounts_per_minute gauge",
+                f"createuser_accounts_per_minute {rep['accounts_per_min']}"]
+        return "\n".join(out) + "\n"
+
+METRICS = Metrics()
+
+# ========= DIAGNOSTICS =========
+class Diagnostics:
+    """
+    Screenshot & snapshot debug tanpa membebani hot path.
+    - level: off | failures | sample:N | always
+    - capture(): PNG diambil saat itu juga di thread worker (halaman yang benar, sebelum recover /
+      akun berikutnya); hanya penulisan file yang di background
+    - note(): ring buffer per worker berisi snapshot ringan (payload diag, state form, dst.)
+      yang baru ditulis ke disk kalau akun gagal (persist())
+    - total ukuran file di folder diag dibatasi max_bytes; file tertua dihapus dulu
+    """
+    def __init__(self, level: str, outdir: str, ring=20, max_bytes=200 * 1024 * 1024):
+        self.level = level
+        self.sample_n = int(level.split(":", 1)[1]) if level.startswith("sample:") else 0
+        self.outdir = outdir
+        self.ring_size = ring
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.written = 0
+        self.files = deque()   # (path, size) urut dari yang paling lama
+        self.total = 0
+        self.q = queue.Queue()
+        self.thread = None
+
+    def start(self):
+        """Siapkan folder & thread writer (dipanggil dari main; capture sebelum ini tetap antre)."""
+        if self.level == "off" or self.thread is not None:
+            return
+        os.makedirs(self.outdir, exist_ok=True)
+        for name in sorted(os.listdir(self.outdir), key=lambda n: os.path.getmtime(os.path.join(self.outdir, n))):
+            path = os.path.join(self.outdir, name)
+            if os.path.isfile(path):
+                self._track(path)
+        self.thread = threading.Thread(target=self._run, name="diag", daemon=True)
+        self.thread.start()
+
+    def _ring(self) -> deque:
+        ring = getattr(self.local, "ring", None)
+        if ring is None:
+            ring = self.local.ring = deque(maxlen=self.ring_size)
+        return ring
+
+    def _want(self, failure: bool) -> bool:
+        if self.level == "off":
+            return False
+        if failure or self.level == "always":
+            return True
+        if self.sample_n:
+            with self.lock:
+                self.seq += 1
+                return self.seq % self.sample_n == 0
+        return False
+
+    def note(self, kind: str, payload=None):
+        """Catat snapshot ringan ke ring buffer worker ini (tanpa I/O, tanpa round trip)."""
+        if self.level != "off":
+            self._ring().append({"ts": _now_iso(), "kind": kind, "data": payload})
+
+    def capture(self, driver, name: str, failure=False):
+        """
+        Ambil screenshot. PNG selalu diambil sinkron di thread worker (kalau ditunda, worker sudah
+        lanjut/reload form dan perintah ke sesi WebDriver yang sama bisa bertabrakan); hanya
+        penulisan ke disk yang ditunda ke background.
+        """
+        self.note("capture", name)
+        if not self._want(failure):
+            return
+        try:
+            png = driver.get_screenshot_as_png()
+        except Exception as e:
+            log.debug("Diag screenshot gagal (%s): %s", name, e)
+            return
+        self.q.put(("png", png, name))
+
+    def persist(self, tag: str):
+        """Akun gagal: simpan isi ring buffer worker ini ke disk (di background)."""
+        ring = self._ring()
+        if self.level == "off" or not ring:
+            return
+        entries = list(ring)
+        ring.clear()
+        self.q.put(("ring", entries, tag))
+
+    def _path(self, name: str, ext: str) -> str:
+        # hanya dipanggil dari thread background -> counter tidak perlu lock
+        self.written += 1
+        safe = re.sub(r"[^\w.-]+", "_", name)
+        return os.path.join(self.outdir, f"{time.strftime('%Y%m%d-%H%M%S')}_{self.written:05d}_{safe}.{ext}")
+
+    def _track(self, path: str):
+        size = os.path.getsize(path)
+        self.files.append((path, size))
+        self.total += size
+        while self.total > self.max_bytes and len(self.files) > 1:
+            old, sz = self.files.popleft()
+            self.total -= sz
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def _run(self):
+        while True:
+            item = self.q.get()
+            try:
+                if item is None:
+                    return
+                kind, obj, name = item
+                if kind == "png":
+                    path = self._path(name, "png")
+                    with open(path, "wb") as fh:
+                        fh.write(obj)
+                else:
+                    path = self._path(f"ring_{name}", "json")
+                    with open(path, "w", encoding="utf-8") as fh:
+                        json.dump(obj, fh, indent=2, default=str)
+                self._track(path)
+            except Exception as e:
+                log.debug("Diag capture gagal (%s): %s", item and item[2], e)
+            finally:
+                self.q.task_done()
+
+    def close(self, timeout=10):
+        """Tunggu antrean tulis capture selesai (dipanggil sebelum driver.quit / exit)."""
+        if self.thread is None:
+            return
+        end = time.time() + timeout
+        while self.q.unfinished_tasks and time.time() < end:
+            time.sleep(0.05)
+
+DIAG = Diagnostics(
+    DIAG_LEVEL, os.path.join(LOG_DIR, "diag"),
+    ring=DIAG_RING, max_bytes=int(DIAG_MAX_MB * 1024 * 1024),
+)
+
 # ========= JS HELPERS =========
 def _js_set_value(driver, el, value: str):
     driver.execute_script("""
@@ -93,52 +488,103 @@ def _js_set_value(driver, el, value: str):
         el.dispatchEvent(new Event('change', {bubbles: true}));
     """, el, value)
 
+# Satu primitive readiness: di-inject per wait, lalu browser sendiri yang menunggu
+# (MutationObserver + Angular notifyWhenNoOutstandingRequests) dan memanggil
+# callback execute_async_script begitu kondisi terpenuhi.
+# Hasilnya 1 round trip WebDriver per wait, bukan polling tiap 100ms.
+_JS_WAIT_READY = """
+var args = arguments, done = args[args.length - 1];
+var cond = args[0], timeoutMs = args[1], stableMs = args[2];
+function visible(el) { return !!el && el.offsetParent !== null; }
+function alertText() { var al = document.querySelector('cp-alert-list'); return (al && al.innerText) || ''; }
+var alert0 = alertText();
+var checks = {
+    view: function () { return !!document.querySelector('#viewContent'); },
+    create_form: function () {
+        if (visible(document.getElementById('createLoadingPanel'))) return false;
+        return visible(document.getElementById('txtUserName'));
+    },
+    create_button: function () {
+        var b = document.getElementById('btnCreateEmailAccount');
+        return visible(b) && !b.disabled && getComputedStyle(b).pointerEvents !== 'none';
+    },
+    create_done: function () {
+        if (visible(document.getElementById('createLoadingPanel'))) return false;
+        var u = document.getElementById('txtUserName');
+        if (visible(u) && (u.value || '').trim() === '') return 'reset';
+        var t = alertText();
+        if (t === alert0 || !t.trim()) return false;
+        return /created/i.test(t) ? 'created' : 'alert';  // alert error baru: tidak perlu menunggu timeout
+    }
+};
+var check = checks[cond], finished = false, okSince = 0, idleWaiting = false, obs = null, poll = null, timer = null;
+function finish(res) {
+    if (finished) return;
+    finished = true;
+    if (obs) obs.disconnect();
+    clearInterval(poll);
+    clearTimeout(timer);
+    done(res);
+}
+function whenAngularIdle(cb) {
+    try {
+        var el = document.querySelector('#viewContent') || document.body;
+        var inj = window.angular && angular.element(el).injector && angular.element(el).injector();
+        if (!inj) return cb();
+        var $browser = inj.get('$browser');
+        if ($browser.notifyWhenNoOutstandingRequests) return $browser.notifyWhenNoOutstandingRequests(cb);
+        return inj.get('$$testability').whenStable(cb);
+    } catch (e) { cb(); }
+}
+function evaluate() {
+    if (finished || idleWaiting) return;
+    if (!check()) { okSince = 0; return; }
+    if (!okSince) okSince = Date.now();
+    var left = stableMs - (Date.now() - okSince);
+    if (left > 0) { setTimeout(evaluate, left); return; }
+    idleWaiting = true;
+    whenAngularIdle(function () {
+        idleWaiting = false;
+        var state = check();
+        if (state) finish({ok: true, idle: true, state: state}); else okSince = 0;
+    });
+}
+if (!check) { done({ok: false, reason: 'unknown condition ' + cond}); return; }
+obs = new MutationObserver(evaluate);
+obs.observe(document.documentElement, {subtree: true, childList: true, attributes: true, characterData: true});
+poll = setInterval(evaluate, 250);  // jaring pengaman: perubahan computed style tanpa mutation
+timer = setTimeout(function () {
+    // DOM sudah siap tapi Angular tak kunjung idle -> tetap lanjut (toleransi sama dgn versi lama)
+    var state = check();
+    finish(state ? {ok: true, idle: false, state: state} : {ok: false, reason: 'timeout'});
+}, timeoutMs);
+evaluate();
+"""
+
+def wait_js_ready(driver, cond: str, timeout=30, stable_ms=0):
+    """Tunggu kondisi `cond` di browser dalam satu round trip; TimeoutException kalau tidak tercapai."""
+    driver.set_script_timeout(timeout + 5)
+    res = driver.execute_async_script(_JS_WAIT_READY, cond, int(timeout * 1000), int(stable_ms)) or {}
+    if not res.get("ok"):
+        raise TimeoutException(f"JS ready '{cond}' tidak tercapai: {res.get('reason')}")
+    return res
+
 def _wait_angular_ready(driver, timeout=30):
-    wait = WebDriverWait(driver, timeout)
-    # container ng-view ada
-    wait.until(lambda d: d.execute_script("return !!document.querySelector('#viewContent')"))
-    # Angular idle (kalau ada)
-    try:
-        wait.until(lambda d: d.execute_script("return !!window.angular"))
-        wait.until(lambda d: d.execute_script("""
-            try {
-                var el = document.querySelector('#viewContent');
-                var inj = window.angular && window.angular.element(el).injector && window.angular.element(el).injector();
-                if (!inj) return true;
-                var $http = inj.get('$http');
-                return $http.pendingRequests.length === 0;
-            } catch(e){ return true; }
-        """))
-    except TimeoutException:
-        pass
+    # container ng-view ada + Angular idle (kalau ada)
+    with METRICS.stage("wait_angular_ready"):
+        wait_js_ready(driver, "view", timeout)
 
 # ========= READY CHECK & DIAGNOSIS =========
-def wait_create_button_ready(driver, timeout=30):
+def wait_create_button_ready(driver, timeout=30, stable_ms=None):
     """
     Tunggu tombol Create 'cukup siap':
     - element ada & terlihat
-    - tidak disabled stabil selama ~0.5s
+    - tidak disabled stabil selama stable_ms (default READY_STABLE_MS)
     (lebih toleran terhadap overlay/validator yang lambat)
     """
-    end = time.time() + timeout
-    last_ok = 0
-    while time.time() < end:
-        ok = driver.execute_script("""
-            const btn = document.getElementById('btnCreateEmailAccount');
-            if(!btn) return false;
-            const visible = btn.offsetParent !== null;
-            const disabled = !!btn.disabled || getComputedStyle(btn).pointerEvents === 'none';
-            return visible && !disabled;
-        """)
-        if ok:
-            if last_ok == 0:
-                last_ok = time.time()
-            if time.time() - last_ok >= 0.5:
-                return True
-        else:
-            last_ok = 0
-        time.sleep(0.1)
-    raise TimeoutException("Create button not ready in time")
+    with METRICS.stage("wait_create_button_ready"):
+        wait_js_ready(driver, "create_button", timeout, READY_STABLE_MS if stable_ms is None else stable_ms)
+    return True
 
 def _dump_create_button_diagnostics(driver, tag="btn_diag"):
     try:
@@ -158,22 +604,25 @@ def _dump_create_button_diagnostics(driver, tag="btn_diag"):
             };
         """)
         log.warning("Create button diag (%s): %s", tag, info)
+        DIAG.note(f"btn_diag:{tag}", info)
     except Exception as e:
         log.warning("Diag error (%s): %s", tag, e)
 
 # ========= LOGIN & TOKEN =========
-def login_and_get_token_base(driver, wait) -> str:
+def login_and_get_token_base(driver, wait, url=None, user=None, password=None) -> str:
     """
     Login ke /login/, tunggu redirect ke URL bertoken:
     Contoh: https://cpanel.host.tld/cpsess0620021535/
+    (kredensial default dari env CPANEL_URL/CPANEL_USER/CPANEL_PASS)
     """
-    log.info("Open login page… %s", CPANEL_URL)
-    driver.get(CPANEL_URL)
+    url = url or CPANEL_URL
+    log.info("Open login page… %s", url)
+    driver.get(url)
 
     # Isi kredensial
     log.info("Login ke cPanel…")
-    wait.until(EC.presence_of_element_located((By.ID, "user"))).send_keys(CPANEL_USER)
-    driver.find_element(By.ID, "pass").send_keys(CPANEL_PASS)
+    wait.until(EC.presence_of_element_located((By.ID, "user"))).send_keys(user or CPANEL_USER)
+    driver.find_element(By.ID, "pass").send_keys(password or CPANEL_PASS)
     driver.find_element(By.ID, "login_submit").click()
 
     # Tunggu sampai URL mengandung /cpsess\d+/
@@ -183,13 +632,13 @@ def login_and_get_token_base(driver, wait) -> str:
     try:
         wait.until(token_ready)
     except TimeoutException:
-        driver.save_screenshot(os.path.join(LOG_DIR, "login_timeout.png"))
+        DIAG.capture(driver, "login_timeout", failure=True)
         log.exception("Login timeout atau tidak redirect ke URL bertoken.")
         raise
 
     m = re.search(r"^(https?://[^/]+/cpsess\d+/)", driver.current_url)
     if not m:
-        driver.save_screenshot(os.path.join(LOG_DIR, "no_token_after_login.png"))
+        DIAG.capture(driver, "no_token_after_login", failure=True)
         log.error("Tidak menemukan token cpsess di URL setelah login: %s", driver.current_url)
         raise RuntimeError("Tidak menemukan token cpsess di URL setelah login.")
     token_base = m.group(1)
@@ -209,19 +658,16 @@ def go_email_accounts_list(driver, wait, token_base: str):
             wait.until(EC.presence_of_element_located((By.ID, "accounts_table")))
         except TimeoutException:
             wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#btnCreateEmailAccount")))
-    driver.save_screenshot(os.path.join(LOG_DIR, "01_email_list.png"))
+    DIAG.capture(driver, "01_email_list")
 
 def go_to_create_form(driver, wait, token_base: str):
     """Langsung ke route create, lalu tunggu field unik form."""
     url = token_base + "frontend/jupiter/email_accounts/index.html#/create/"
     log.info("Buka Create via hash: %s", url)
     driver.get(url)
-    _wait_angular_ready(driver, 30)
-
-    # Tunggu loading panel hilang jika ada
+    # Loading panel hilang + username terlihat + Angular idle (satu round trip)
     try:
-        panel = WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.ID, "createLoadingPanel")))
-        WebDriverWait(driver, 20).until(EC.invisibility_of_element(panel))
+        wait_js_ready(driver, "create_form", 30)
     except TimeoutException:
         pass
 
@@ -231,7 +677,7 @@ def go_to_create_form(driver, wait, token_base: str):
             EC.visibility_of_element_located((By.ID, "txtUserName"))
         )
     log.info("Form Create terdeteksi.")
-    driver.save_screenshot(os.path.join(LOG_DIR, "02_create_form.png"))
+    DIAG.capture(driver, "02_create_form")
     return el
 
 def _find_password_input(driver, wait):
@@ -258,7 +704,10 @@ def _get_selected_domain_text(driver) -> str:
 
 # ========= FORM ISIAN (KHUSUS UI Jupiter) =========
 def fill_create_form(driver, wait, localpart: str, pwd: str,
-                     prefer_unlimited=True, send_welcome=True, stay_after_create=True):
+                     prefer_unlimited=True, send_welcome=True, stay_after_create=True,
+                     domain=None, quota_mb=0):
+    """domain=None -> env DOMAIN; domain='' -> jangan sentuh dropdown (sudah terpilih)."""
+    domain = DOMAIN if domain is None else domain
     log.info("Isi form: user=%s", localpart)
     with try_all_frames(driver):
         # Username
@@ -270,8 +719,8 @@ def fill_create_form(driver, wait, localpart: str, pwd: str,
             pass
         _js_set_value(driver, username_input, localpart)
 
-        # Domain: hanya kalau ada dropdown DAN env DOMAIN diisi
-        if DOMAIN:
+        # Domain: hanya kalau ada dropdown DAN domain diisi
+        if domain:
             domains_len = driver.execute_script("return (window.PAGE && PAGE.mailDomains && PAGE.mailDomains.length) || 0;")
             if domains_len > 1:
                 try:
@@ -279,10 +728,10 @@ def fill_create_form(driver, wait, localpart: str, pwd: str,
                     driver.execute_script("arguments[0].scrollIntoView({block:'center'});", ddl)
                     ddl.click()
                     opt = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, f"//select[@id='ddlDomain']/option[normalize-space(text())='{DOMAIN}']"))
+                        EC.element_to_be_clickable((By.XPATH, f"//select[@id='ddlDomain']/option[normalize-space(text())='{domain}']"))
                     )
                     opt.click()
-                    log.info("Pilih domain: %s", DOMAIN)
+                    log.info("Pilih domain: %s", domain)
                 except Exception as e:
                     log.warning("Dropdown domain tidak dapat dipilih (%s). Lanjut default.", e)
             else:
@@ -310,8 +759,19 @@ def fill_create_form(driver, wait, localpart: str, pwd: str,
         except Exception:
             pass
 
-        # Quota: Unlimited
-        if prefer_unlimited:
+        # Quota: angka (MB) kalau diminta, selain itu Unlimited
+        if quota_mb and quota_mb > 0:
+            try:
+                limited = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.ID, "userDefinedQuota"))
+                )
+                if not limited.is_selected():
+                    driver.execute_script("arguments[0].click();", limited)
+                _js_set_value(driver, driver.find_element(By.ID, "quota"), str(quota_mb))
+                log.info("Quota: %s MB", quota_mb)
+            except Exception as e:
+                log.warning("Set quota %s MB gagal (%s).", quota_mb, e)
+        elif prefer_unlimited:
             try:
                 unlim = WebDriverWait(driver, 10).until(
                     EC.element_to_be_clickable((By.ID, "unlimitedQuota"))
@@ -348,9 +808,149 @@ def fill_create_form(driver, wait, localpart: str, pwd: str,
             pass
 
         # Domain final (untuk log/cek)
-        final_domain = DOMAIN or _get_selected_domain_text(driver)
+        final_domain = domain or _get_selected_domain_text(driver)
         return final_domain
 
+# Fast path: semua field & toggle diisi lewat scope Angular dalam SATU execute_script.
+# Hasilnya terstruktur (control mana yang ketemu/diubah + mismatch) supaya
+# pemanggil bisa jatuh ke jalur per-field di atas kalau ada yang tidak cocok.
+_JS_FILL_FORM = """
+var v = arguments[0];
+var res = {found: {}, changed: {}, mismatch: [], domain: ''};
+function visible(el) { return !!el && el.offsetParent !== null; }
+function ngSet(el, val) {
+    try {
+        var ng = window.angular && angular.element(el);
+        var ctrl = ng && ng.controller('ngModel');
+        if (ctrl) {
+            var scope = ng.scope();
+            var apply = function () { ctrl.$setViewValue(val); ctrl.$render(); };
+            if (scope.$root.$$phase) apply(); else scope.$apply(apply);
+            el.dispatchEvent(new Event('blur'));
+            return;
+        }
+    } catch (e) {}
+    el.focus();
+    el.value = val;
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.dispatchEvent(new Event('blur'));
+}
+function setText(key, el, val) {
+    res.found[key] = !!el;
+    if (!el) return;
+    if (el.value !== val) { ngSet(el, val); res.changed[key] = true; }
+    if (el.value !== val) res.mismatch.push(key);
+}
+function setChecked(key, el, want, required) {
+    res.found[key] = !!el;
+    if (!el) { if (required) res.mismatch.push(key); return; }
+    if (el.disabled) return;
+    if (!!el.checked !== want) { el.click(); res.changed[key] = true; }
+    if (!!el.checked !== want) res.mismatch.push(key);
+}
+
+setText('username', document.getElementById('txtUserName'), v.local);
+
+var ddl = document.getElementById('ddlDomain');
+if (v.domain && ddl && ddl.options.length > 1) {
+    res.found.domain = true;
+    var opt = Array.prototype.find.call(ddl.options, function (o) { return o.text.trim() === v.domain; });
+    if (!opt) res.mismatch.push('domain');
+    else if (ddl.value !== opt.value) {
+        ddl.value = opt.value;
+        ddl.dispatchEvent(new Event('change', {bubbles: true}));
+        res.changed.domain = true;
+    }
+}
+
+var pwds = Array.prototype.filter.call(document.querySelectorAll("password input[type='password']"), visible);
+if (!pwds.length) pwds = Array.prototype.filter.call(document.querySelectorAll("input[type='password']"), visible);
+setText('password', pwds[0], v.pwd);
+
+var btnOpt = document.getElementById('btnShowOptionalSettings');
+res.found.optional = !!btnOpt;
+if (visible(btnOpt) && !document.querySelector('#optionalSettingsDiv')) { btnOpt.click(); res.changed.optional = true; }
+
+if (v.quota > 0) {
+    setChecked('limited', document.getElementById('userDefinedQuota'), true, true);
+    setText('quota', document.getElementById('quota'), String(v.quota));
+    if (!res.found.quota) res.mismatch.push('quota');
+} else if (v.unlimited) setChecked('unlimited', document.getElementById('unlimitedQuota'), true, true);
+var cb = document.getElementById('send_welcome_email');
+if (visible(cb)) setChecked('welcome', cb, v.welcome, false);
+setChecked('stay', document.getElementById('stay'), v.stay, false);
+
+var span = document.querySelector('#spanAddEmailAccountDomains .domain-text');
+res.domain = span ? span.innerText.trim().replace(/^@/, '') : '';
+return res;
+"""
+
+def fill_create_form_fast(driver, localpart: str, pwd: str,
+                          prefer_unlimited=True, send_welcome=True, stay_after_create=True,
+                          domain=None, quota_mb=0) -> dict:
+    """Isi form dalam satu round trip. Return dict hasil JS; res['mismatch'] kosong = sukses."""
+    log.info("Isi form (fast): user=%s", localpart)
+    return driver.execute_script(_JS_FILL_FORM, {
+        "local": localpart,
+        "pwd": pwd,
+        "domain": DOMAIN if domain is None else domain,
+        "quota": quota_mb or 0,
+        "unlimited": prefer_unlimited,
+        "welcome": send_welcome,
+        "stay": stay_after_create,
+    }) or {"mismatch": ["no-result"]}
+
+# ========= PIPELINE =========
+# Submit add_pop lewat fetch() di halaman yang sudah login (cookie + token sesi browser yang sama),
+# sampai `depth` request in-flight sekaligus. Respons dikumpulkan di window.__cpPipe dan
+# dikembalikan per id, jadi akun berikutnya tidak menunggu round trip akun sebelumnya.
+_JS_PIPE = """
+var args = arguments, done = args[args.length - 1];
+var url = args[0], items = args[1], depth = args[2], waitMs = args[3], timeoutMs = args[4];
+var P = window.__cpPipe = window.__cpPipe || {inflight: 0, done: [], wake: null};
+items.forEach(function (it) {
+    P.inflight++;
+    var t0 = performance.now(), ctl = new AbortController();
+    var timer = setTimeout(function () { ctl.abort(); }, timeoutMs);
+    fetch(url, {method: 'POST', body: new URLSearchParams(it.params), credentials: 'same-origin',
+                redirect: 'manual', signal: ctl.signal})
+        .then(function (r) {
+            return r.text().then(function (body) {
+                return {id: it.id, http: r.status, body: body, retryAfter: r.headers.get('Retry-After'),
+                        redirected: r.type === 'opaqueredirect'};
+            });
+        })
+        .catch(function (e) { return {id: it.id, http: 0, body: '', error: String(e)}; })
+        .then(function (res) {
+            clearTimeout(timer);
+            res.ms = performance.now() - t0;
+            P.inflight--;
+            P.done.push(res);
+            if (P.wake) P.wake();
+        });
+});
+// depth=0: tunggu semua selesai; selain itu kembali begitu ada slot kosong
+function ready() { return depth ? P.inflight < depth : P.inflight === 0; }
+function finish() {
+    P.wake = null;
+    clearTimeout(guard);
+    var out = P.done;
+    P.done = [];
+    done({results: out, inflight: P.inflight});
+}
+var guard = setTimeout(finish, waitMs);
+if (ready()) finish();
+else P.wake = function () { if (ready()) finish(); };
+"""
+
+def pipe_round(driver, url: str, items: list, depth: int, timeout=HTTP_TIMEOUT) -> dict:
+    """Kirim `items` ({id, params}) lalu ambil respons yang sudah datang; blok hanya kalau pipeline penuh."""
+    driver.set_script_timeout(timeout + 10)
+    return driver.execute_async_script(
+        _JS_PIPE, url, items, depth, int((timeout + 5) * 1000), int(timeout * 1000)
+    ) or {"results": [], "inflight": 0}
+
 # ========= SUBMIT & VERIFIKASI =========
 def submit_create(driver, wait):
     # 1) Coba submit via ENTER di password (kadang hook submit listen di sana)
@@ -358,7 +958,6 @@ def submit_create(driver, wait):
         pwd_input = _find_password_input(driver, wait)
         pwd_input.send_keys(Keys.ENTER)
         log.info("Coba submit via ENTER.")
-        time.sleep(0.3)  # beri kesempatan hook submit jalan
     except Exception:
         pass
 
@@ -378,47 +977,27 @@ def submit_create(driver, wait):
             log.info("Klik Create (native).")
         except Exception as e:
             log.warning("Klik native gagal (%s). Pakai JS.", e)
+            METRICS.incr("forced_js_click")
             driver.execute_script("arguments[0].click();", btn)
             log.info("Klik Create (JS forced).")
 
 def wait_create_cycle(driver, timeout=30):
     """
     Dipakai ketika 'Stay on this page' aktif:
-    - Tunggu loading panel (#createLoadingPanel) muncul lalu hilang
-    - Tunggu username field kosong kembali (form reset)
+    - Tunggu loading panel (#createLoadingPanel) hilang
+    - Tunggu username field kosong kembali (form reset) atau alert 'created' baru
+    Alert error baru (duplikat, password ditolak, ...) langsung return False untuk diklasifikasi.
     """
     try:
-        WebDriverWait(driver, 5).until(EC.visibility_of_element_located((By.ID, "createLoadingPanel")))
-    except TimeoutException:
-        pass
-
-    try:
-        panel = driver.find_element(By.ID, "createLoadingPanel")
-        WebDriverWait(driver, timeout).until(EC.invisibility_of_element(panel))
-    except Exception:
-        pass
-
-    # Form reset? (username kosong)
-    try:
-        username_input = WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.ID, "txtUserName")))
-        val = username_input.get_attribute("value") or ""
-        if val.strip() == "":
+        res = wait_js_ready(driver, "create_done", timeout)
+        if res.get("state") != "alert":
             return True
     except TimeoutException:
         pass
+    except Exception as e:
+        log.warning("Cek siklus create error (%s).", e)
 
-    # Alternatif: cek alert sukses
-    try:
-        ok = driver.execute_script("""
-            const al = document.querySelector('cp-alert-list');
-            return al && al.innerText && /created/i.test(al.innerText);
-        """)
-        if ok:
-            return True
-    except Exception:
-        pass
-
-    driver.save_screenshot(os.path.join(LOG_DIR, "after_create_unclear.png"))
+    DIAG.capture(driver, "after_create_unclear", failure=True)
     return False
 
 def wait_after_submit(driver, wait):
@@ -435,7 +1014,7 @@ def wait_after_submit(driver, wait):
         try:
             WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "accounts_table")))
         except TimeoutException:
-            driver.save_screenshot(os.path.join(LOG_DIR, "after_submit_unknown.png"))
+            DIAG.capture(driver, "after_submit_unknown", failure=True)
             log.warning("Tidak redirect ke list & tabel tidak muncul (UNKNOWN).")
             return False
     return True
@@ -448,99 +1027,1955 @@ def assert_account_exists(driver, wait, email_addr: str) -> bool:
         log.info("Terverifikasi muncul di list: %s", email_addr)
         return True
     except TimeoutException:
-        driver.save_screenshot(os.path.join(LOG_DIR, f"verify_missing_{email_addr.replace('@','_')}.png"))
+        DIAG.capture(driver, f"verify_missing_{email_addr.replace('@','_')}", failure=True)
         log.warning("Tidak menemukan baris untuk: %s", email_addr)
         return False
 
-# ========= MAIN (BATCH) =========
-def main():
-    if not all([CPANEL_URL, CPANEL_USER, CPANEL_PASS]):
-        log.error("Env CPANEL_URL/CPANEL_USER/CPANEL_PASS wajib diisi.")
-        print("Env CPANEL_URL/CPANEL_USER/CPANEL_PASS wajib diisi.", file=sys.stderr)
-        sys.exit(2)
+# ========= KLASIFIKASI KEGAGALAN & RETRY =========
+F_CREATED   = "created"           # ternyata sudah jadi (alert sukses / akun ada di server)
+F_DUPLICATE = "duplicate"
+F_PASSWORD  = "password_policy"   # password ditolak (terlalu lemah / policy)
+F_QUOTA     = "quota_exceeded"    # batas jumlah akun / disk paket tercapai
+F_SESSION   = "session_expired"
+F_TRANSIENT = "transient"         # error server sementara (timeout, 5xx, locked)
+F_UI_STUCK  = "ui_stuck"          # form tidak merespons (tanpa alert, tanpa reset)
+F_OTHER     = "other"             # error lain yang tidak dikenali
 
-    opts = webdriver.ChromeOptions()
-    # opts.add_argument("--headless=new")  # aktifkan untuk CI/headless
+PASSWORD_RE  = re.compile(r"too weak|strength|password.*(polic|cannot be used|not strong)|kata sandi|lemah", re.I)
+QUOTA_RE     = re.compile(r"maximum (number of )?(allowed )?e-?mail accounts|max_?pop|exceed.*quota|"
+                          r"quota.*exceed|disk quota|over quota|kuota", re.I)
+SESSION_RE   = re.compile(r"login_submit|(session|token).*(expired|invalid)", re.I)
+TRANSIENT_RE = re.compile(r"time(d)? ?out|temporar|try again|locked|busy|unavailable|HTTP 5\d\d", re.I)
+
+# kategori -> (aksi, maksimum retry per akun); "skip" = langsung final
+RETRY_POLICY = {
+    F_TRANSIENT: ("backoff", 3),
+    F_UI_STUCK:  ("reopen", 1),
+    F_SESSION:   ("relogin", 1),
+    F_PASSWORD:  ("regen_password", 1),
+    F_QUOTA:     ("skip", 0),
+    F_OTHER:     ("skip", 0),
+}
+# status akhir kalau kategori tidak (lagi) diulang
+FINAL_FOR = {F_CREATED: OK, F_DUPLICATE: DUPLICATE, F_PASSWORD: REJECTED, F_QUOTA: REJECTED}
+
+def classify_error(text: str, http_status=None) -> str:
+    """Kategori kegagalan dari pesan error (alert UI / errors UAPI) + status HTTP."""
+    text = text or ""
+    if http_status in (401, 403) or SESSION_RE.search(text):
+        return F_SESSION
+    if DUP_RE.search(text):
+        return F_DUPLICATE
+    if PASSWORD_RE.search(text):
+        return F_PASSWORD
+    if QUOTA_RE.search(text):
+        return F_QUOTA
+    if (http_status or 0) >= 500 or TRANSIENT_RE.search(text):
+        return F_TRANSIENT
+    return F_OTHER
+
+class CreateFailed(RuntimeError):
+    """Create tidak terkonfirmasi; `category` menentukan kebijakan retry."""
+    def __init__(self, category: str, detail=""):
+        super().__init__(f"{category}: {detail}" if detail else category)
+        self.category = category
+
+class RetryBudget:
+    """Jatah retry global untuk seluruh batch (semua worker), supaya kegagalan massal tidak memakan jam."""
+    def __init__(self, total: int):
+        self.left = total
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            if self.left <= 0:
+                return False
+            self.left -= 1
+            return True
+
+RETRIES = RetryBudget(RETRY_BUDGET)
+
+def plan_retry(acct: Account, category: str):
+    """Aksi retry untuk kategori ini, atau None kalau tidak layak diulang (skip / batas akun / jatah global habis)."""
+    action, limit = RETRY_POLICY.get(category, ("skip", 0))
+    if action == "skip" or acct.retries[category] >= limit:
+        return None
+    if not RETRIES.take():
+        METRICS.incr("retry_budget_exhausted")
+        log.warning("Jatah retry global habis; %s (%s) tidak diulang.", acct.email, category)
+        return None
+    acct.retries[category] += 1
+    METRICS.incr(f"retry_{category}")
+    return action
 
-    log.info("Menghubungkan ke Selenium: http://s-chromium:4444")
-    driver = webdriver.Remote("http://s-chromium:4444", options=opts)
-    wait = waitx(driver, 25)
+def final_status(category: str) -> str:
+    return FINAL_FOR.get(category, UNKNOWN)
 
+_regen_lock = threading.Lock()
+
+def regenerate_password(acct: Account):
+    """Ganti password yang ditolak policy; password baru dicatat ke REGEN_FILE (chmod 600) supaya tidak hilang."""
+    acct.password = gen_pass(20)
+    with _regen_lock:
+        new = not os.path.exists(REGEN_FILE) or os.path.getsize(REGEN_FILE) == 0
+        with _open_private(REGEN_FILE) as fh:
+            w = csv.writer(fh)
+            if new:
+                w.writerow(["email", "password", "time"])
+            w.writerow([acct.email, acct.password, _now_iso()])
+    log.info("Password %s ditolak policy; diganti (tercatat di %s).", acct.email, REGEN_FILE)
+
+_JS_CREATE_STATE = """
+function visible(el) { return !!el && el.offsetParent !== null; }
+var al = document.querySelector('cp-alert-list');
+var items = al ? al.querySelectorAll('.alert, cp-alert') : [];
+var pwd = document.querySelector("password input[type='password']") || document.querySelector("input[type='password']");
+var btn = document.getElementById('btnCreateEmailAccount');
+return {
+    alert: items.length ? items[items.length - 1].innerText : ((al && al.innerText) || ''),
+    login: !!document.getElementById('login_submit') || location.pathname.indexOf('/login') === 0,
+    loading: visible(document.getElementById('createLoadingPanel')),
+    pwd_invalid: !!pwd && (pwd.classList.contains('ng-invalid') || !!pwd.closest('.has-error')),
+    btn_disabled: !!btn && !!btn.disabled,
+    hash: location.hash
+};
+"""
+
+def classify_create_failure(driver):
+    """Baca alert, state validasi & halaman setelah create tak terkonfirmasi -> (kategori, detail)."""
     try:
-        # 1) Login & ambil token base
-        token_base = login_and_get_token_base(driver, wait)
+        st = driver.execute_script(_JS_CREATE_STATE) or {}
+    except Exception as e:
+        return F_UI_STUCK, f"state form tidak terbaca ({e})"
+    DIAG.note("create_state", st)
+    text = (st.get("alert") or "").strip()
+    if st.get("login"):
+        return F_SESSION, "halaman login"
+    if text:
+        cat = classify_error(text)
+        if cat == F_OTHER and re.search(r"created|berhasil", text, re.I):
+            return F_CREATED, text[:200]
+        if cat != F_OTHER:
+            return cat, text[:200]
+    if st.get("pwd_invalid"):
+        return F_PASSWORD, "validator password menolak"
+    if st.get("loading"):
+        return F_TRANSIENT, "request create belum selesai"
+    return (F_OTHER, text[:200]) if text else (F_UI_STUCK, f"tanpa alert/reset (tombol disabled={st.get('btn_disabled')})")
+
+# ========= BACKEND =========
+class UapiError(RuntimeError):
+    """Error dari UAPI (HTTP non-200, respons bukan JSON, atau status=0)."""
+    def __init__(self, message, http_status=None):
+        super().__init__(message)
+        self.http_status = http_status
+
+class ServerBusy(UapiError):
+    """
+    Server kewalahan: 429/503 (ditolak sebelum diproses, aman diulang buta) atau 5xx lain yang
+    sudah dicek keberadaannya. Engine menurunkan limit, melepas slot, lalu mengulang setelah jeda.
+    """
+    def __init__(self, message, http_status=None, retry_after=None):
+        super().__init__(message, http_status)
+        self.retry_after = retry_after
+
+class SessionExpired(UapiError):
+    """Token cpsess/cookie ditolak (401/403, redirect ke /login/)."""
+
+# hanya status yang pasti belum memproses request; 500/502/504 (mis. proxy timeout) bisa
+# datang setelah mailbox terlanjur dibuat -> jalur F_TRANSIENT yang cek keberadaan dulu
+BUSY_HTTP = (429, 503)
+
+def add_pop_params(acct: Account) -> dict:
+    """Parameter Email::add_pop untuk satu akun (dipakai backend UAPI & pipeline browser)."""
+    params = {
+        "email": acct.local,
+        "password": acct.password,
+        "quota": acct.quota_mb,     # 0 = unlimited (sama dengan form)
+        "send_welcome_email": int(acct.send_welcome),
+    }
+    if acct.domain:
+        params["domain"] = acct.domain
+    return params
+
+# OPERATION selain create -> fungsi UAPI Email::*
+OPERATIONS = {"delete": "delete_pop", "passwd": "passwd_pop", "quota": "edit_pop_quota"}
+NOTFOUND_RE = re.compile(r"does ?n[o']t exist|not found|no such|tidak ada", re.I)
 
-        successes = dupes = unknowns = 0
+def modify_params(acct: Account, op: str) -> dict:
+    params = {"email": acct.local}
+    if acct.domain:
+        params["domain"] = acct.domain
+    if op == "passwd":
+        params["password"] = acct.password
+    elif op == "quota":
+        params["quota"] = acct.quota_mb     # 0 = unlimited
+    return params
 
-        # 2) Loop pembuatan akun
-        for i in range(1, COUNT + 1):
-            local = f"{EMAIL_PREFIX}{i:03d}"  # akun001, akun002, ...
-            pwd   = PASSWORD_STATIC or gen_pass()
-            log.info(f"[{i}/{COUNT}] Proses {local}@{DOMAIN or '(default)'}")
+def modify_account(client: "UapiClient", acct: Account, op: str) -> str:
+    """
+    delete / passwd / quota untuk satu mailbox lewat UAPI, dengan sesi & kebijakan retry yang sama
+    dengan create. Delete dengan VERIFY=bulk mengembalikan PENDING (hilangnya dicek sekaligus).
+    """
+    func = OPERATIONS[op]
+    while True:
+        try:
+            with METRICS.stage(f"uapi_{func}"):
+                client.call("Email", func, **modify_params(acct, op))
+            log.info("%s OK: %s", op, acct.email)
+            return PENDING if op == "delete" and VERIFY == "bulk" else OK
+        except ServerBusy:
+            raise  # diulang oleh engine setelah backoff
+        except UapiError as e:
+            if NOTFOUND_RE.search(str(e)):
+                log.info("%s dilewati, mailbox tidak ada: %s", op, acct.email)
+                return SKIPPED
+            if (e.http_status or 0) >= 500:
+                raise ServerBusy(str(e), e.http_status) from e  # operasi idempoten: backoff oleh engine
+            category = classify_error(str(e), e.http_status)
+            log.warning("%s gagal untuk %s [%s]: %s", func, acct.email, category, e)
+        except requests.RequestException as e:
+            category = F_TRANSIENT  # ketiga operasi idempoten: aman diulang
+            log.warning("%s error jaringan untuk %s: %s", func, acct.email, e)
+        METRICS.incr(f"fail_{category}")
+        action = plan_retry(acct, category)
+        if action is None:
+            return final_status(category)
+        if action == "regen_password":
+            regenerate_password(acct)
+        elif action == "backoff":
+            time.sleep(min(30, 2 ** acct.retries[category]))
+
+class UapiClient:
+    """
+    Klien UAPI lewat HTTP keep-alive, memakai sesi login yang sama dengan browser:
+    cookie sesi + prefix token (https://host:2083/cpsessNNN/).
+    """
+    def __init__(self, token_base: str, cookies=None, pool_size=4, timeout=HTTP_TIMEOUT, sessions=None):
+        self.token_base = token_base
+        self.timeout = timeout
+        self.sessions = sessions  # SessionManager: re-auth otomatis saat token kedaluwarsa
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self._set_cookies(cookies)
+
+    def _set_cookies(self, cookies):
+        for c in cookies or []:
+            self.http.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+
+    @classmethod
+    def from_driver(cls, driver, token_base: str, **kw):
+        return cls(token_base, driver.get_cookies(), **kw)
+
+    def use(self, sess):
+        """Ganti ke sesi baru (setelah login ulang)."""
+        self.token_base = sess.token_base
+        self.http.cookies.clear()
+        self._set_cookies(sess.cookies)
+
+    def call(self, module: str, func: str, **params) -> dict:
+        try:
+            return self._call(module, func, params)
+        except SessionExpired:
+            if self.sessions is None:
+                raise
+            self.use(self.sessions.refresh(self.token_base))
+            return self._call(module, func, params)
+
+    def _call(self, module: str, func: str, params: dict) -> dict:
+        url = f"{self.token_base}execute/{module}/{func}"
+        r = self.http.post(url, data=params, timeout=self.timeout, allow_redirects=False)
+        if r.status_code in (401, 403) or (r.is_redirect and "/login" in r.headers.get("Location", "")):
+            raise SessionExpired(f"HTTP {r.status_code}: sesi ditolak untuk {module}::{func}", r.status_code)
+        if r.status_code in BUSY_HTTP:
+            ra = r.headers.get("Retry-After", "")
+            raise ServerBusy(f"HTTP {r.status_code} dari {module}::{func}", r.status_code,
+                             float(ra) if ra.isdigit() else None)
+        if r.status_code != 200:
+            raise UapiError(f"HTTP {r.status_code} dari {module}::{func}", r.status_code)
+        try:
+            payload = r.json()
+        except ValueError:
+            if "login_submit" in r.text:
+                raise SessionExpired(f"{module}::{func} mengembalikan halaman login", r.status_code)
+            raise UapiError(f"Respons {module}::{func} bukan JSON", r.status_code)
+        if not payload.get("status"):
+            raise UapiError("; ".join(payload.get("errors") or []) or f"{module}::{func} status=0", r.status_code)
+        return payload
 
-            # Pastikan mulai dari form create (langsung ke route)
+    def list_accounts(self, domain: str = "", page_size=1000) -> set:
+        """
+        Ambil seluruh alamat mailbox sekali jalan (Email::list_pops, paginasi UAPI)
+        ke dalam set lower-case, supaya cek keberadaan cukup O(1) per akun.
+        """
+        found, page = set(), 1
+        while True:
+            payload = self.call("Email", "list_pops", **{
+                "api.paginate": 1,
+                "api.paginate_size": page_size,
+                "api.paginate_start": (page - 1) * page_size + 1,
+            })
+            for row in payload.get("data") or []:
+                email = (row.get("email") or row.get("login") or "").lower()
+                if "@" in email and (not domain or email.endswith("@" + domain.lower())):
+                    found.add(email)
+            pages = ((payload.get("metadata") or {}).get("paginate") or {}).get("total_pages") or 1
+            if page >= pages or not payload.get("data"):
+                return found
+            page += 1
+
+    def account_exists(self, acct: Account) -> bool:
+        """Satu mailbox sudah ada? (list_pops terfilter regex, tanpa menarik seluruh daftar)"""
+        domain = re.escape(acct.domain) if acct.domain else r"[^@]+"
+        payload = self.call("Email", "list_pops", regex=f"^{re.escape(acct.local)}@{domain}$")
+        rows = payload.get("data") or []
+        if not acct.domain:
+            return bool(rows)  # domain default belum diketahui: local part yang cocok sudah cukup
+        return any((row.get("email") or "").lower() == acct.email.lower() for row in rows)
+
+    def list_domains(self) -> list:
+        """
+        Domain yang bisa dipakai untuk mailbox (Email::list_mail_domains), lower-case, urut dari
+        cPanel: yang pertama domain utama (dipakai form & add_pop kalau domain tidak diisi).
+        """
+        payload = self.call("Email", "list_mail_domains")
+        return [(row.get("domain") or "").lower() for row in payload.get("data") or [] if row.get("domain")]
+
+    def account_limit(self):
+        """
+        Sisa slot mailbox paket (StatsBar::get_stats emailaccounts): (dipakai, maksimum).
+        maksimum None = unlimited.
+        """
+        payload = self.call("StatsBar", "get_stats", display="emailaccounts")
+        for row in payload.get("data") or []:
+            if row.get("name") == "emailaccounts" or "email_accounts" in str(row.get("id", "")):
+                used = int(row.get("_count", row.get("count")) or 0)
+                cap = str(row.get("_max", row.get("max")) or "")
+                return used, int(cap) if cap.isdigit() else None
+        return None, None
+
+    def close(self):
+        self.http.close()
+
+class SeleniumBackend:
+    """Buat akun lewat form Create di UI Jupiter (jalur lama, satu browser)."""
+    name = "selenium"
+
+    def __init__(self, driver, wait, token_base: str, client: UapiClient = None, sessions=None):
+        self.driver = driver
+        self.wait = wait
+        self.token_base = token_base
+        self.client = client  # untuk verifikasi bulk (list_pops) dengan sesi yang sama
+        self.sessions = sessions
+        self.form_ready = False  # form Create sudah ter-load & ter-reset oleh akun sebelumnya
+        self.current_domain = None
+        # PIPELINE>0: akun yang submit-nya masih in-flight (id -> akun), retry 429 terjadwal, hasil final
+        self.inflight = {}
+        self.retry = []
+        self.done = []
+        self.seq = 0
+
+    def _relogin(self):
+        """Browser terlempar ke /login/: ambil sesi baru (bersama) dan pasang lagi tanpa restart batch."""
+        self.sessions.refresh(self.token_base)
+        self.token_base = self.sessions.attach_browser(self.driver, self.wait)
+        if self.client is not None:
+            self.client.use(self.sessions.get())
+        self.form_ready = False
+
+    def _open_form(self):
+        driver, wait, token_base = self.driver, self.wait, self.token_base
+        # Pastikan mulai dari form create (langsung ke route)
+        with METRICS.stage("go_to_create_form"):
             try:
                 go_to_create_form(driver, wait, token_base)
             except Exception as e:
                 log.warning("Gagal membuka form Create, refresh & coba lagi… (%s)", e)
+                METRICS.incr("reopen_create_form")
                 driver.refresh()
                 go_email_accounts_list(driver, wait, token_base)
                 go_to_create_form(driver, wait, token_base)
 
-            # Isi form
-            final_domain = fill_create_form(
-                driver, wait, local, pwd,
-                prefer_unlimited=True,
-                send_welcome=True,
-                stay_after_create=True
-            )
+    def _form_reusable(self) -> bool:
+        """Form dari akun sebelumnya masih di route create & siap diisi? (tanpa driver.get)"""
+        if not (REUSE_FORM and self.form_ready):
+            return False
+        try:
+            if not (self.driver.execute_script("return location.hash || ''") or "").startswith("#/create"):
+                return False
+            wait_js_ready(self.driver, "create_form", 5)
+            return True
+        except Exception as e:
+            log.info("Form lama tidak bisa dipakai ulang (%s); buka ulang.", e)
+            return False
+
+    def create(self, acct: Account) -> str:
+        """
+        Buat satu akun. Kalau create tidak terkonfirmasi, kegagalannya diklasifikasi dulu:
+        cek apakah submit pertama ternyata berhasil, lalu retry sesuai RETRY_POLICY
+        (relogin / buka ulang form / backoff / ganti password) atau langsung final.
+        """
+        if PIPELINE > 0:
+            return self._submit_pipelined(acct)
+        while True:
+            try:
+                status = self._create(acct)
+                if status != UNKNOWN or self.sessions is None or not _logged_out(self.driver):
+                    return status
+                category, detail = F_SESSION, "terlempar ke halaman login"
+            except CreateFailed as e:
+                category, detail = e.category, str(e)
+            except Exception as e:
+                if self.sessions is None or not _logged_out(self.driver):
+                    raise
+                category, detail = F_SESSION, str(e)
+            METRICS.incr(f"fail_{category}")
+            log.warning("Create %s tidak terkonfirmasi: %s", acct.email, detail)
+            if category == F_CREATED:
+                return OK
+            if category in (F_SESSION, F_UI_STUCK, F_TRANSIENT) and self._exists(acct):
+                log.info("Submit sebelumnya ternyata berhasil: %s", acct.email)
+                return OK
+            action = plan_retry(acct, category)
+            if action is None:
+                return final_status(category)
+            self._recover(acct, action, category)
+
+    def _exists(self, acct: Account) -> bool:
+        """Cek langsung ke server (satu list_pops terfilter) sebelum submit ulang."""
+        if self.client is None:
+            return False
+        try:
+            return self.client.account_exists(acct)
+        except Exception as e:
+            log.info("Cek keberadaan %s gagal (%s).", acct.email, e)
+            return False
+
+    def _recover(self, acct: Account, action: str, category: str):
+        log.info("Retry %s: %s", acct.email, action)
+        if action == "relogin" and self.sessions is not None:
+            self._relogin()
+        elif action == "backoff":
+            time.sleep(min(30, 2 ** acct.retries[category]))
+        elif action == "regen_password":
+            regenerate_password(acct)
+        if action != "regen_password":
+            self.form_ready = False  # buka ulang form dari awal
+
+    def _create(self, acct: Account) -> str:
+        driver, wait = self.driver, self.wait
+
+        # Pakai ulang form yang sudah ter-reset; buka ulang hanya kalau state-nya rusak
+        # (mode VERIFY=row selalu pindah ke list, jadi form tidak pernah ditandai siap)
+        reused = self._form_reusable()
+        if reused:
+            METRICS.incr("form_reused")
+        else:
+            self._open_form()
+        self.form_ready = False
 
-            # Delay mikro agar meter/validator settle
-            time.sleep(0.3)
+        # Domain cukup dipilih sekali per kelompok: form yang dipakai ulang masih memegang domain terakhir
+        domain = "" if reused and acct.domain == self.current_domain else acct.domain
+        opts = dict(prefer_unlimited=acct.quota_mb <= 0, send_welcome=acct.send_welcome,
+                    stay_after_create=True, domain=domain, quota_mb=acct.quota_mb)
 
-            # Submit
+        # Isi form: fast path satu round trip, fallback per-field kalau ada mismatch
+        with METRICS.stage("fill_form"):
+            final_domain = None
+            if FAST_FILL:
+                res = fill_create_form_fast(driver, acct.local, acct.password, **opts)
+                DIAG.note("fast_fill", res)
+                if res.get("mismatch"):
+                    log.warning("Fast fill mismatch %s (found=%s); pakai jalur per-field.",
+                                res.get("mismatch"), res.get("found"))
+                    METRICS.incr("fast_fill_fallback")
+                else:
+                    final_domain = domain or res.get("domain") or ""
+            if final_domain is None:
+                final_domain = fill_create_form(driver, wait, acct.local, acct.password, **opts)
+        self.current_domain = acct.domain
+
+        # Submit (menunggu tombol Create stabil = meter/validator sudah settle)
+        with METRICS.stage("submit"):
             submit_create(driver, wait)
 
-            # Tunggu siklus create selesai tanpa redirect
-            if not wait_create_cycle(driver, timeout=35):
-                log.warning("Create tidak terkonfirmasi; coba sekali lagi.")
-                # satu retry aman
-                try:
-                    submit_create(driver, wait)
-                    if not wait_create_cycle(driver, timeout=35):
-                        unknowns += 1
-                        continue
-                except Exception:
-                    unknowns += 1
-                    continue
+        # Tunggu siklus create selesai tanpa redirect; kalau tidak, klasifikasi (retry diputuskan create())
+        with METRICS.stage("wait_create_cycle"):
+            confirmed = wait_create_cycle(driver, timeout=35)
+        if not confirmed:
+            category, detail = classify_create_failure(driver)
+            if category != F_CREATED:
+                # form masih memegang isian/alert lama; regen password cukup isi ulang di form yang sama
+                self.form_ready = category == F_PASSWORD
+                raise CreateFailed(category, detail)
 
-            # (Jika tidak stay) tunggu pasca-submit; kalau stay, ini cepat selesai
+        if final_domain and not acct.domain:
+            acct.domain = final_domain
+
+        # Mode bulk: keberadaan dicek belakangan sekaligus lewat verify()
+        if VERIFY == "bulk" and self.client is not None:
+            # Siklus create selesai & form ter-reset: akun berikutnya langsung isi tanpa driver.get
+            self.form_ready = True
+            return PENDING
+
+        # (Jika tidak stay) tunggu pasca-submit; kalau stay, ini cepat selesai
+        with METRICS.stage("wait_after_submit"):
             if not wait_after_submit(driver, wait):
-                unknowns += 1
+                return UNKNOWN
+
+        # Konfirmasi apakah akun tampil di list
+        with METRICS.stage("assert_account_exists"):
+            if assert_account_exists(driver, wait, acct.email):
+                return OK
+        # coba deteksi duplikat
+        dup_xp = "//*[contains(., 'already exists') or contains(., 'sudah ada') or contains(., 'duplicate')]"
+        with try_all_frames(driver):
+            if driver.find_elements(By.XPATH, dup_xp):
+                return DUPLICATE
+        return UNKNOWN
+
+    # --- pipeline (PIPELINE>0) ---
+    def _submit_pipelined(self, acct: Account) -> str:
+        """Kirim add_pop akun ini tanpa menunggu respons akun sebelumnya; status menyusul lewat resolved()."""
+        self.seq += 1
+        self.inflight[self.seq] = acct
+        now = time.time()
+        due = [a for t, a in self.retry if t <= now]
+        self.retry = [(t, a) for t, a in self.retry if t > now]
+        items = [self._pipe_item(acct, self.seq)]
+        for a in due:
+            self.seq += 1
+            self.inflight[self.seq] = a
+            items.append(self._pipe_item(a, self.seq))
+        with METRICS.stage("pipe_submit"):
+            self._pipe(items, PIPELINE)
+        return INFLIGHT
+
+    @staticmethod
+    def _pipe_item(acct: Account, pid: int) -> dict:
+        return {"id": pid, "params": add_pop_params(acct)}
+
+    def _pipe(self, items: list, depth: int, relogged=False):
+        url = self.token_base + "execute/Email/add_pop"
+        expired = self._collect(pipe_round(self.driver, url, items, depth))
+        if not expired:
+            return
+        if relogged:
+            log.warning("Pipeline: sesi baru juga ditolak untuk %d akun; UNKNOWN.", len(expired))
+            self.done += [(acct, UNKNOWN) for acct in expired]
+            return
+        # respons 401 = sesi mati: tunggu sisa in-flight (ikut ditolak), login ulang sekali, kirim ulang
+        expired += self._collect(pipe_round(self.driver, url, [], 0))
+        log.warning("Pipeline: sesi ditolak untuk %d akun; login ulang & kirim ulang.", len(expired))
+        self._relogin()
+        items = []
+        for acct in expired:
+            self.seq += 1
+            self.inflight[self.seq] = acct
+            items.append(self._pipe_item(acct, self.seq))
+        self._pipe(items, depth, relogged=True)
+
+    def _collect(self, res: dict) -> list:
+        """Proses respons pipeline; return akun yang ditolak karena sesi mati."""
+        expired = []
+        for r in res.get("results") or []:
+            acct = self.inflight.pop(r["id"], None)
+            if acct is not None and self._resolve(acct, r):
+                expired.append(acct)
+        return expired
+
+    def _resolve(self, acct: Account, r: dict) -> bool:
+        """Terjemahkan respons fetch ke status akun. Return True kalau sesi ditolak (perlu kirim ulang)."""
+        METRICS.observe("pipe_add_pop", (r.get("ms") or 0) / 1000.0, acct)
+        http, body = r.get("http"), r.get("body") or ""
+        if http in (401, 403) or r.get("redirected") or (http != 200 and "login_submit" in body):
+            return True
+        if http in BUSY_HTTP:
+            acct.busy_retries += 1
+            METRICS.incr("pipe_busy")
+            if acct.busy_retries > BUSY_RETRIES or not RETRIES.take():
+                log.warning("Pipeline: server terus sibuk untuk %s (HTTP %s); UNKNOWN.", acct.email, http)
+                self.done.append((acct, UNKNOWN))
+            else:
+                ra = str(r.get("retryAfter") or "")
+                delay = float(ra) if ra.isdigit() else min(30, 2 ** acct.busy_retries)
+                self.retry.append((time.time() + delay, acct))
+            return False
+        if http and http >= 500:
+            METRICS.incr(f"fail_{F_TRANSIENT}")
+            log.warning("Pipeline: HTTP %s untuk %s; cek dulu apakah sudah terbuat.", http, acct.email)
+            if self._exists(acct):
+                log.info("Submit sebelumnya ternyata berhasil: %s", acct.email)
+                self.done.append((acct, OK))
+            elif plan_retry(acct, F_TRANSIENT) == "backoff":
+                self.retry.append((time.time() + min(30, 2 ** acct.retries[F_TRANSIENT]), acct))
+            else:
+                self.done.append((acct, final_status(F_TRANSIENT)))
+            return False
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            if "login_submit" in body:
+                return True
+            log.warning("Pipeline: respons add_pop %s tidak terbaca (HTTP %s, %s).",
+                        acct.email, http, r.get("error") or "bukan JSON")
+            self.done.append((acct, UNKNOWN))
+            return False
+        if payload.get("status"):
+            log.info("Dibuat (pipeline, %.0f ms): %s", r.get("ms") or 0, acct.email)
+            self.done.append((acct, OK))
+            return False
+        err = "; ".join(payload.get("errors") or []) or "status=0"
+        category = classify_error(err)
+        if category == F_DUPLICATE:
+            log.info("Sudah ada: %s (%s)", acct.email, err)
+            self.done.append((acct, DUPLICATE))
+            return False
+        METRICS.incr(f"fail_{category}")
+        log.warning("add_pop gagal untuk %s [%s]: %s", acct.email, category, err)
+        action = plan_retry(acct, category) if category in (F_PASSWORD, F_TRANSIENT) else None
+        if action == "regen_password":
+            regenerate_password(acct)
+            self.retry.append((time.time(), acct))
+        elif action == "backoff":
+            self.retry.append((time.time() + min(30, 2 ** acct.retries[category]), acct))
+        else:
+            self.done.append((acct, final_status(category)))
+        return False
+
+    def modify(self, acct: Account, op: str) -> str:
+        """delete/passwd/quota tidak punya form massal: pakai UAPI dengan sesi browser yang sama."""
+        return modify_account(self.client, acct, op)
+
+    def resolved(self) -> list:
+        """Akun yang status finalnya sudah diketahui sejak panggilan terakhir: [(akun, status)]."""
+        out, self.done = self.done, []
+        return out
+
+    def finish(self):
+        """Tunggu semua submit pipeline (termasuk retry 429 terjadwal) selesai."""
+        try:
+            while self.inflight or self.retry:
+                if self.inflight:
+                    self._pipe([], 0)
+                    continue
+                wake = min(t for t, _ in self.retry)
+                time.sleep(max(0.0, wake - time.time()))
+                now = time.time()
+                due = [a for t, a in self.retry if t <= now]
+                self.retry = [(t, a) for t, a in self.retry if t > now]
+                items = []
+                for a in due:
+                    self.seq += 1
+                    self.inflight[self.seq] = a
+                    items.append(self._pipe_item(a, self.seq))
+                self._pipe(items, PIPELINE)
+        finally:
+            # browser mati di tengah jalan: hasil akun yang tersisa tidak diketahui
+            for acct in list(self.inflight.values()) + [a for _, a in self.retry]:
+                self.done.append((acct, UNKNOWN))
+            self.inflight.clear()
+            self.retry = []
+
+    def verify(self, accts) -> dict:
+        """
+        Verifikasi bulk: ambil daftar akun sekali, cek tiap alamat di set.
+        Kalau API list gagal, jatuh ke cek tabel per akun (cara lama).
+        """
+        try:
+            with METRICS.stage("verify_bulk"):
+                existing = self.client.list_accounts()
+            log.info("Verifikasi bulk: %d akun di server, cek %d akun.", len(existing), len(accts))
+            return {a.email: a.email.lower() in existing for a in accts}
+        except (UapiError, requests.RequestException) as e:
+            log.warning("Daftar akun via API gagal (%s); fallback cek tabel per akun.", e)
+        go_email_accounts_list(self.driver, self.wait, self.token_base)
+        return {a.email: assert_account_exists(self.driver, self.wait, a.email) for a in accts}
+
+    def close(self):
+        DIAG.close()  # tulis dulu screenshot yang masih antre
+        self.driver.quit()
+
+class UapiBackend:
+    """
+    Buat akun langsung via UAPI Email::add_pop (tanpa form).
+    Browser hanya dipakai untuk login; sesudahnya semua lewat HTTP keep-alive.
+    """
+    name = "uapi"
+    shareable = True  # satu requests.Session ber-pool aman dipakai banyak thread
+
+    def __init__(self, client: UapiClient):
+        self.client = client
+
+    def verify(self, accts) -> dict:
+        # add_pop status=1 sudah final; PENDING hanya dari delete (cek hilangnya sekaligus)
+        with METRICS.stage("verify_bulk"):
+            existing = self.client.list_accounts()
+        return {a.email: a.email.lower() in existing for a in accts}
+
+    def modify(self, acct: Account, op: str) -> str:
+        return modify_account(self.client, acct, op)
+
+    def resolved(self) -> list:
+        return []  # tidak pernah INFLIGHT
+
+    def finish(self):
+        pass
+
+    def create(self, acct: Account) -> str:
+        while True:
+            try:
+                with METRICS.stage("uapi_add_pop"):
+                    self.client.call("Email", "add_pop", **add_pop_params(acct))
+                log.info("Dibuat via UAPI: %s", acct.email)
+                return OK
+            except ServerBusy:
+                raise  # diulang oleh engine setelah backoff
+            except UapiError as e:
+                category = classify_error(str(e), e.http_status)
+                if category == F_DUPLICATE:
+                    log.info("Sudah ada: %s (%s)", acct.email, e)
+                    return DUPLICATE
+                log.warning("add_pop gagal untuk %s [%s]: %s", acct.email, category, e)
+                if (e.http_status or 0) >= 500:
+                    # 500/502/504: cek dulu (mungkin sudah terbuat), lalu backoff diserahkan ke engine
+                    # sebagai ServerBusy: limiter ikut turun & jeda terjadi di luar slot in-flight
+                    METRICS.incr(f"fail_{category}")
+                    if self._exists(acct):
+                        log.info("Submit sebelumnya ternyata berhasil: %s", acct.email)
+                        return OK
+                    raise ServerBusy(f"{e} (belum terbuat)", e.http_status) from e
+            except requests.RequestException as e:
+                # timeout/putus di tengah: request mungkin sudah diproses server
+                category = F_TRANSIENT
+                log.warning("add_pop error jaringan untuk %s: %s", acct.email, e)
+            METRICS.incr(f"fail_{category}")
+            if category in (F_TRANSIENT, F_SESSION) and self._exists(acct):
+                log.info("Submit sebelumnya ternyata berhasil: %s", acct.email)
+                return OK
+            action = plan_retry(acct, category)
+            if action is None:
+                return final_status(category)
+            if action == "regen_password":
+                regenerate_password(acct)
+            elif action == "backoff":
+                time.sleep(min(30, 2 ** acct.retries[category]))
+            # relogin: client.call sudah login ulang sekali; percobaan berikutnya memakai sesi baru
+
+    def _exists(self, acct: Account) -> bool:
+        try:
+            return self.client.account_exists(acct)
+        except (UapiError, requests.RequestException):
+            return False
+
+    def close(self):
+        self.client.close()
+
+# ========= SESSION =========
+@dataclass
+class CpSession:
+    """Hasil login cPanel: prefix token (…/cpsessNNN/) + cookie sesi."""
+    token_base: str
+    cookies: list
+    created: float
+
+    @property
+    def origin(self) -> str:
+        return re.match(r"^(https?://[^/]+)", self.token_base).group(1)
+
+def chrome_options():
+    """
+    Profil browser cepat (semua bisa diatur via env): headless, gambar & web font diblok,
+    pageLoadStrategy eager (tidak menunggu subresource), flag tambahan dari CHROME_ARGS.
+    CSS sengaja tidak diblok: cek readiness bergantung pada computed style (visible/pointer-events).
+    """
+    opts = webdriver.ChromeOptions()
+    if HEADLESS:
+        opts.add_argument("--headless=new")
+        opts.add_argument("--window-size=1366,900")  # layout desktop Jupiter (bukan mobile)
+    if BLOCK_IMAGES:
+        opts.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if BLOCK_FONTS:
+        opts.add_argument("--disable-remote-fonts")
+    for arg in CHROME_ARGS.split():
+        opts.add_argument(arg)
+    opts.page_load_strategy = PAGE_LOAD_STRATEGY
+    return opts
+
+_GRID = cycle(SELENIUM_URLS)
+_GRID_LOCK = threading.Lock()
+
+def new_driver():
+    _load_selenium()
+    with _GRID_LOCK:
+        url = next(_GRID)  # browser baru dibagi rata ke node SELENIUM_URLS
+    log.info("Menghubungkan ke Selenium: %s", url)
+    with METRICS.stage("new_driver"):
+        return webdriver.Remote(url, options=chrome_options())
+
+def _logged_out(driver) -> bool:
+    """Browser terlempar ke halaman login (token kedaluwarsa / sesi putus)?"""
+    try:
+        url = driver.current_url or ""
+        return "/login" in url or bool(driver.find_elements(By.ID, "login_submit"))
+    except Exception:
+        return False
+
+class SessionManager:
+    """
+    Satu login dipakai bersama semua worker (browser & HTTP):
+    - cache token + cookie di memori dan (opsional) di disk dengan TTL, jadi run berikutnya skip login
+    - login via HTTP (/login/?login_only=1), fallback login lewat browser
+    - refresh() dipanggil saat terdeteksi logout; worker lain yang menyusul dapat sesi baru yang sama
+    """
+    def __init__(self, url=None, user=None, password=None, cache_path=SESSION_CACHE, ttl=SESSION_TTL):
+        self.url = (url or CPANEL_URL).rstrip("/")
+        self.user = user or CPANEL_USER
+        self.password = password or CPANEL_PASS
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        self.current = None
+
+    def _fresh(self, sess: CpSession) -> bool:
+        return sess is not None and time.time() - sess.created < self.ttl
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("key") != f"{self.user}@{self.url}":
+                return None
+            sess = CpSession(data["token_base"], data["cookies"], data["created"])
+        except (OSError, ValueError, KeyError):
+            return None
+        return sess if self._fresh(sess) else None
+
+    def _save_cache(self, sess: CpSession):
+        if not self.cache_path:
+            return
+        data = {"key": f"{self.user}@{self.url}", "token_base": sess.token_base,
+                "cookies": sess.cookies, "created": sess.created}
+        # cookie sesi = kredensial: file hanya bisa dibaca pemilik
+        with _open_private(self.cache_path, "w") as fh:
+            json.dump(data, fh)
+
+    def _drop_cache(self):
+        if self.cache_path and os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+    def _http_login(self) -> CpSession:
+        http = requests.Session()
+        # ikuti redirect (mis. https://cpanel.host.tld -> https://host:2083/) untuk dapat origin asli
+        origin = re.match(r"^(https?://[^/]+)", http.get(self.url, timeout=HTTP_TIMEOUT).url).group(1)
+        r = http.post(origin + "/login/?login_only=1", data={"user": self.user, "pass": self.password},
+                      timeout=HTTP_TIMEOUT)
+        try:
+            payload = r.json()
+        except ValueError:
+            raise UapiError(f"Login HTTP: respons bukan JSON (HTTP {r.status_code})", r.status_code)
+        token = payload.get("security_token") or ""
+        if not payload.get("status") or not token.startswith("/cpsess"):
+            raise UapiError(f"Login HTTP ditolak: {payload.get('message') or r.status_code}", r.status_code)
+        cookies = [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path} for c in http.cookies]
+        http.close()
+        return CpSession(f"{origin}{token}/", cookies, time.time())
+
+    def _browser_login(self, driver=None) -> CpSession:
+        own = driver is None
+        driver = driver or new_driver()
+        try:
+            token_base = login_and_get_token_base(driver, waitx(driver, 25), self.url, self.user, self.password)
+            return CpSession(token_base, driver.get_cookies(), time.time())
+        finally:
+            if own:
+                DIAG.close()
+                driver.quit()
+
+    def get(self) -> CpSession:
+        with self.lock:
+            if self._fresh(self.current):
+                return self.current
+            sess = self._load_cache()
+            if sess is not None:
+                log.info("Pakai sesi cPanel dari cache (%s).", sess.token_base)
+            else:
+                with METRICS.stage("login"):
+                    if SESSION_LOGIN == "http":
+                        try:
+                            sess = self._http_login()
+                            log.info("Login HTTP OK: %s", sess.token_base)
+                        except Exception as e:
+                            log.warning("Login HTTP gagal (%s); fallback login lewat browser.", e)
+                    if sess is None:
+                        sess = self._browser_login()
+                METRICS.incr("login")
+                self._save_cache(sess)
+            self.current = sess
+            return sess
+
+    def refresh(self, stale_token_base: str) -> CpSession:
+        """Sesi `stale_token_base` ditolak server. Login ulang sekali, kecuali worker lain sudah melakukannya."""
+        with self.lock:
+            if self.current is not None and self.current.token_base != stale_token_base:
+                return self.current
+            log.warning("Sesi cPanel kedaluwarsa (%s); login ulang.", stale_token_base)
+            METRICS.incr("relogin")
+            self.current = None
+            self._drop_cache()
+            return self.get()
+
+    def attach_browser(self, driver, wait) -> str:
+        """
+        Pasang sesi bersama ke browser (inject cookie) tanpa mengisi form login.
+        Kalau ditolak, login lewat browser itu sendiri dan jadikan sesi bersama yang baru.
+        Return token_base yang berlaku untuk browser ini.
+        """
+        sess = self.get()
+        try:
+            driver.get(sess.origin + "/login/")
+            for c in sess.cookies:
+                driver.add_cookie({"name": c["name"], "value": c["value"], "path": c.get("path") or "/"})
+            driver.get(sess.token_base + "frontend/jupiter/email_accounts/index.html#/list")
+            if not _logged_out(driver):
+                return sess.token_base
+        except Exception as e:
+            log.warning("Inject cookie sesi ke browser gagal (%s).", e)
+        log.info("Sesi bersama ditolak browser; login lewat form.")
+        with METRICS.stage("login"):
+            sess = self._browser_login(driver)
+        METRICS.incr("login")
+        with self.lock:
+            self.current = sess
+            self._save_cache(sess)
+        return sess.token_base
+
+# ========= SESI & INPUT =========
+def open_backend(kind: str, sessions: SessionManager):
+    """
+    Backend siap pakai dari sesi bersama:
+    - uapi: langsung HTTP (tanpa browser kalau login HTTP / cache berhasil)
+    - selenium: browser baru, cookie sesi di-inject (login form hanya kalau ditolak)
+    """
+    if kind not in ("selenium", "uapi"):
+        raise ValueError(f"BACKEND tidak dikenal: {kind} (pilih: selenium | uapi)")
+    pool_size = max(4, WORKERS, ASYNC_MAX)
+    if kind == "uapi":
+        sess = sessions.get()
+        return UapiBackend(UapiClient(sess.token_base, sess.cookies, pool_size=pool_size, sessions=sessions))
+    driver = new_driver()
+    try:
+        wait = waitx(driver, 25)
+        token_base = sessions.attach_browser(driver, wait)
+        client = UapiClient.from_driver(driver, token_base, pool_size=pool_size, sessions=sessions)
+        return SeleniumBackend(driver, wait, token_base, client, sessions)
+    except Exception:
+        DIAG.close()
+        driver.quit()
+        raise
+
+def iter_accounts(prefix=EMAIL_PREFIX, domain=DOMAIN, start=START, count=COUNT, quota_mb=QUOTA_MB):
+    """Akun yang diminta env (atau target): prefix + index (akun001, akun002, ...), mulai dari START."""
+    for i in range(start, start + count):
+        yield Account(
+            local=f"{prefix}{i:03d}",
+            domain=domain,
+            password=new_password(),
+            index=i,
+            quota_mb=quota_mb,
+        )
+
+def _truthy(val, default=True) -> bool:
+    if val is None or str(val).strip() == "":
+        return default
+    return str(val).strip().lower() in ("1", "true", "yes", "y", "ya", "on")
+
+def _account_from_row(row: dict, n: int, default_domain=DOMAIN) -> Account:
+    local = str(row.get("local") or "").strip()
+    domain = str(row.get("domain") or "").strip()
+    email = str(row.get("email") or "").strip()
+    if not local and "@" in email:
+        local, domain = email.split("@", 1)
+    if not local:
+        raise ValueError("kolom local/email kosong")
+    quota = row.get("quota", row.get("quota_mb"))
+    return Account(
+        local=local,
+        domain=domain or default_domain,
+        password=new_password(str(row.get("password") or "")),
+        index=n,
+        quota_mb=int(quota) if str(quota or "").strip() else QUOTA_MB,
+        send_welcome=_truthy(row.get("welcome")),
+    )
+
+def iter_manifest(path: str, domain=DOMAIN):
+    """
+    Stream manifest baris demi baris (CSV ber-header atau JSONL); tidak pernah memuat seluruh file.
+    Kolom: local, domain, quota, password, welcome (atau email=local@domain).
+    """
+    with open(path, newline="", encoding="utf-8") as fh:
+        jsonl = path.endswith((".jsonl", ".ndjson"))
+        rows = (line for line in fh if line.strip()) if jsonl else csv.DictReader(fh)
+        for n, row in enumerate(rows, 1):
+            try:
+                if jsonl:
+                    row = json.loads(row)  # per baris: satu baris rusak tidak menggagalkan batch
+                if not isinstance(row, dict):
+                    raise ValueError(f"baris bukan objek JSON ({type(row).__name__})")
+                acct = _account_from_row(row, n, domain)
+            except ValueError as e:  # termasuk json.JSONDecodeError
+                log.warning("Manifest baris %d dilewati: %s", n, e)
                 continue
+            yield acct
+
+def group_by_domain(accts, chunk: int):
+    """
+    Kelompokkan per domain di dalam jendela `chunk` baris (memori tetap rata),
+    supaya pemilihan domain di form terjadi sekali per kelompok, bukan per baris.
+    """
+    buf = []
+    for acct in accts:
+        buf.append(acct)
+        if len(buf) >= chunk:
+            buf.sort(key=lambda a: a.domain)
+            yield from buf
+            buf = []
+    buf.sort(key=lambda a: a.domain)
+    yield from buf
+
+class JobSource:
+    """
+    Antrean kerja bersama yang menarik akun lazily dari generator (aman untuk manifest 100k baris)
+    plus antrean retry untuk akun yang dikembalikan worker.
+    """
+    def __init__(self, accts, total=None):
+        self.it = iter(accts)
+        self.retry = deque()
+        self.lock = threading.Lock()
+        self.total = total   # None = tidak diketahui (manifest)
+
+    def get(self):
+        """Akun berikutnya, atau None kalau habis."""
+        with self.lock:
+            if self.retry:
+                return self.retry.popleft()
+            return next(self.it, None)
+
+    def put(self, acct: Account):
+        with self.lock:
+            self.retry.append(acct)
+
+    def empty(self) -> bool:
+        with self.lock:
+            if self.retry:
+                return False
+            nxt = next(self.it, None)
+            if nxt is None:
+                return True
+            self.retry.append(nxt)
+            return False
+
+    def drain(self) -> int:
+        """Hitung (dan buang) sisa akun yang belum diambil worker."""
+        with self.lock:
+            n = len(self.retry)
+            self.retry.clear()
+            return n + sum(1 for _ in self.it)
+
+    def label(self, acct: Account) -> str:
+        return f"{acct.index}/{self.total}" if self.total else f"#{acct.index}"
+
+# ========= JOURNAL =========
+class Journal:
+    """
+    Journal append-only (JSONL) satu baris per percobaan akun.
+    Tiap baris di-fsync, jadi crash di tengah batch tidak menghilangkan progres.
+    Password tidak disimpan, hanya referensi sha256 pendek.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fh = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def load(path: str) -> dict:
+        """
+        Status terakhir per alamat email: {email: entry}. Baris rusak (crash saat tulis, diedit
+        tangan, bukan objek / tanpa email & status) dilewati dengan warning, bukan menggagalkan resume.
+        """
+        last = {}
+        if not os.path.exists(path):
+            return last
+        with open(path, encoding="utf-8") as fh:
+            for n, line in enumerate(fh, 1):
+                try:
+                    entry = json.loads(line)
+                    email, status = entry["email"], entry["status"]
+                    if not isinstance(email, str) or not isinstance(status, str):
+                        raise TypeError("email/status bukan string")
+                    last[email] = entry
+                except (ValueError, KeyError, TypeError) as e:
+                    if line.strip():
+                        log.warning("Journal %s baris %d rusak, dilewati: %r", path, n, e)
+        return last
+
+    def append(self, acct: Account, status: str):
+        entry = {
+            "email": acct.email.lower(),
+            "local": acct.local,
+            "domain": acct.domain,
+            "op": OPERATION,
+            "status": status,
+            "attempt": acct.attempt,
+            "pwd_ref": hashlib.sha256(acct.password.encode()).hexdigest()[:16],
+            "started": _now_iso(acct.started),
+            "finished": _now_iso(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.fh.write(line)
+            self.fh.flush()
+            os.fsync(self.fh.fileno())
+
+    def close(self):
+        self.fh.close()
+
+# ========= RESULTS =========
+def _fernet(key: str):
+    """Fernet dari paket opsional `cryptography` (hanya dibutuhkan untuk output .enc)."""
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise RuntimeError("RESULTS_FILE .enc butuh paket cryptography (pip install cryptography).")
+    if not key:
+        raise RuntimeError("RESULTS_KEY kosong; buat dengan: python -c \"from cryptography.fernet import Fernet; "
+                           "print(Fernet.generate_key().decode())\"")
+    return Fernet(key.encode())
+
+class _SinkPart:
+    """Satu file tujuan + jumlah baris yang sudah di OS tapi belum di-fsync."""
+    def __init__(self, path: str):
+        self.path = path
+        self.fh = _open_private(path)
+        self.unsynced = 0
+        self.rows = 0
+        self.lock = threading.Lock()
+
+    def write(self, line: str):
+        # dipanggil dengan self.lock dipegang; langsung ke OS supaya proses mati tidak menghilangkan baris
+        self.fh.write(line)
+        self.fh.flush()
+        self.unsynced += 1
+
+    def flush(self):
+        # dipanggil dengan self.lock dipegang; yang di-batch hanya fsync-nya
+        if not self.unsynced:
+            return
+        os.fsync(self.fh.fileno())
+        self.unsynced = 0
+
+class ResultSink:
+    """
+    Hasil per akun (alamat, password, status, waktu) di-stream ke file:
+    .csv / .jsonl, atau .enc (JSONL dengan tiap baris dienkripsi Fernet, butuh `cryptography`).
+    - tiap baris langsung ditulis ke OS (proses di-kill tidak kehilangan apa pun); fsync di-batch tiap
+      `batch` baris atau tiap `interval` detik (thread background), jadi hanya crash OS/listrik yang
+      bisa kehilangan `interval` detik terakhir
+    - BatchState.record menulis hasil sebelum journal: OK di journal berarti password sudah di file
+    - per_worker: satu file part per thread (tanpa buffer bersama), digabung ke `path` saat close()
+    - semua file chmod 600
+    """
+    FIELDS = ["time", "email", "password", "status", "attempt", "quota_mb", "elapsed_s", "op"]
+    WITH_PASSWORD = (OK, UNKNOWN)  # akun yang (mungkin) dibuat / diganti password-nya dengan password ini
+
+    def __init__(self, path: str, batch=200, interval=2.0, per_worker=False, key=""):
+        self.path = path
+        self.kind = "enc" if path.endswith(".enc") else "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+        self.fernet = _fernet(key) if self.kind == "enc" else None
+        self.batch = max(1, batch)
+        self.interval = interval
+        self.per_worker = per_worker
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.parts = []
+        self.stop = threading.Event()
+        if not per_worker:
+            self._add_part(path)
+        self.thread = threading.Thread(target=self._flusher, name="results", daemon=True)
+        self.thread.start()
+
+    def _add_part(self, path: str) -> _SinkPart:
+        part = _SinkPart(path)
+        if self.kind == "csv" and os.path.getsize(path) == 0 and not self.per_worker:
+            with part.lock:
+                part.write(self._csv_line(self.FIELDS))
+                part.flush()
+        with self.lock:
+            self.parts.append(part)
+        return part
+
+    def _part(self) -> _SinkPart:
+        if not self.per_worker:
+            return self.parts[0]
+        part = getattr(self.local, "part", None)
+        if part is None:
+            name = re.sub(r"\W+", "_", threading.current_thread().name)
+            part = self.local.part = self._add_part(f"{self.path}.part-{os.getpid()}-{name}")
+        return part
+
+    @staticmethod
+    def _csv_line(values) -> str:
+        out = io.StringIO()
+        csv.writer(out).writerow(values)
+        return out.getvalue()
+
+    def _encode(self, row: dict) -> str:
+        if self.kind == "csv":
+            return self._csv_line([row[f] for f in self.FIELDS])
+        line = json.dumps(row, ensure_ascii=False)
+        if self.fernet is not None:
+            line = self.fernet.encrypt(line.encode("utf-8")).decode("ascii")
+        return line + "\n"
+
+    def write(self, acct: Account, status: str):
+        row = {
+            "time": _now_iso(),
+            "email": acct.email,
+            "password": acct.password if status in self.WITH_PASSWORD and OPERATION in ("create", "passwd") else "",
+            "status": status,
+            "attempt": acct.attempt,
+            "quota_mb": acct.quota_mb,
+            "elapsed_s": round(time.time() - acct.started, 3) if acct.started else "",
+            "op": OPERATION,
+        }
+        line = self._encode(row)
+        part = self._part()
+        with part.lock:
+            part.write(line)
+            part.rows += 1
+            if part.unsynced >= self.batch:
+                part.flush()
 
-            # Konfirmasi apakah akun tampil di list
-            email_full = f"{local}@{final_domain}" if final_domain else local
-            if assert_account_exists(driver, wait, email_full):
-                successes += 1
+    def _flush_all(self):
+        with self.lock:
+            parts = list(self.parts)
+        for part in parts:
+            with part.lock:
+                part.flush()
+
+    def _flusher(self):
+        while not self.stop.wait(self.interval):
+            try:
+                self._flush_all()
+            except OSError as e:
+                log.warning("Flush hasil gagal (%s).", e)
+
+    def close(self):
+        """Flush terakhir; mode per_worker: gabungkan semua part ke `path` lalu hapus part."""
+        self.stop.set()
+        self.thread.join(timeout=5)
+        self._flush_all()
+        for part in self.parts:
+            part.fh.close()
+        if self.per_worker and self.parts:
+            with _open_private(self.path) as out:
+                if self.kind == "csv" and out.tell() == 0:
+                    out.write(self._csv_line(self.FIELDS))
+                for part in self.parts:
+                    with open(part.path, encoding="utf-8", newline="") as fh:
+                        for chunk in iter(lambda: fh.read(1 << 20), ""):
+                            out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            for part in self.parts:
+                os.remove(part.path)
+        log.info("Hasil %d akun ditulis ke %s", sum(p.rows for p in self.parts), self.path)
+
+def read_results(path: str, key: str = RESULTS_KEY):
+    """Baca kembali file hasil (csv/jsonl/enc) sebagai dict per baris."""
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(fh)
+            return
+        fernet = _fernet(key) if path.endswith(".enc") else None
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield json.loads(fernet.decrypt(line.encode("ascii")) if fernet else line)
+
+# ========= WORKER POOL =========
+class BatchState:
+    """
+    Counter SUMMARY + journal + hasil + sesi login bersama, dibagi semua worker (thread-safe).
+    gate: semaphore host cPanel (HOST_LIMIT) yang dipegang selama satu akun diproses.
+    """
+    def __init__(self, journal: Journal = None, sessions: SessionManager = None, results: ResultSink = None,
+                 gate=None):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.journal = journal
+        self.sessions = sessions
+        self.results = results
+        self.gate = gate if gate is not None else nullcontext()
+
+    def record(self, acct: Account, status: str):
+        with self.lock:
+            self.counts[status] += 1
+        METRICS.set_status(acct, status)
+        if status == UNKNOWN:
+            DIAG.persist(acct.email)
+        # hasil dulu: begitu journal bilang OK (dan RESUME melewatinya), password-nya sudah di file
+        if self.results is not None:
+            self.results.write(acct, status)
+        if self.journal is not None:
+            self.journal.append(acct, status)
+
+def flush_pending(wid: int, backend, pending: list, state: BatchState):
+    """Verifikasi bulk akun PENDING (create: harus ada, delete: harus hilang) lalu catat OK/UNKNOWN."""
+    if not pending:
+        return
+    try:
+        result = backend.verify(pending)
+    except Exception:
+        log.exception("[w%d] Verifikasi bulk gagal; %d akun dihitung UNKNOWN.", wid, len(pending))
+        result = None
+    want = OPERATION != "delete"
+    for acct in pending:
+        if result is not None and bool(result.get(acct.email)) == want:
+            state.record(acct, OK)
+        else:
+            log.warning("[w%d] Tidak terverifikasi setelah %s: %s", wid, OPERATION, acct.email)
+            state.record(acct, UNKNOWN)
+    pending.clear()
+
+def perform(backend, acct: Account) -> str:
+    """Jalankan OPERATION untuk satu akun pada backend ini."""
+    if OPERATION == "create":
+        return backend.create(acct)
+    return backend.modify(acct, OPERATION)
+
+def settle(wid: int, backend, pending: list, state: BatchState):
+    """Tunggu submit pipeline yang masih in-flight, catat hasilnya, lalu verifikasi bulk sisa PENDING."""
+    try:
+        backend.finish()
+    except Exception:
+        log.exception("[w%d] Gagal menunggu submit pipeline; sisanya dihitung UNKNOWN.", wid)
+    for acct, status in backend.resolved():
+        state.record(acct, status)
+    flush_pending(wid, backend, pending, state)
+
+def preflight_existing(backend, domain=DOMAIN, manifest=MANIFEST):
+    """
+    Ambil mailbox yang sudah ada sekali di awal (set lower-case): untuk `domain`,
+    atau semua domain kalau input dari manifest. create melewati yang sudah ada,
+    delete/passwd/quota melewati yang tidak ada.
+    None = preflight tidak dipakai (dimatikan, DOMAIN kosong, atau API gagal).
+    """
+    if not PREFLIGHT:
+        return None
+    if not domain and not manifest:
+        log.info("Preflight dilewati: DOMAIN kosong (domain default baru diketahui dari form).")
+        return None
+    try:
+        existing = backend.client.list_accounts("" if manifest else domain)
+    except (UapiError, requests.RequestException) as e:
+        log.warning("Preflight gagal (%s); semua akun tetap diproses.", e)
+        return None
+    log.info("Preflight: %d mailbox sudah ada di %s.", len(existing), "manifest" if manifest else domain)
+    return existing
+
+def plan_jobs(accts, existing, history: dict, state: BatchState):
+    """Akun yang benar-benar perlu dikerjakan; skip preflight/journal dicatat saat ditarik."""
+    for acct in accts:
+        prev = history.get(acct.email.lower())
+        if prev and prev.get("op", "create") != OPERATION:
+            prev = None  # journal operasi lain (mis. create sebelum delete) tidak relevan
+        if RESUME and prev and prev["status"] in FINAL_STATUSES:
+            log.info("Skip (journal: %s): %s", prev["status"], acct.email)
+            with state.lock:
+                state.counts[SKIPPED] += 1
+            continue
+        if existing is not None and (acct.email.lower() in existing) == (OPERATION == "create"):
+            log.info("Skip (%s): %s", "sudah ada" if OPERATION == "create" else "tidak ada", acct.email)
+            state.record(acct, SKIPPED)
+            continue
+        if prev:
+            acct.attempt = prev.get("attempt", 0) + 1
+        yield acct
+
+def run_worker(wid: int, jobs: JobSource, state: BatchState, backend=None):
+    """
+    Satu worker = satu sesi (browser atau HTTP). Ambil akun dari antrean bersama
+    sampai habis, jadi shard yang lambat tidak menahan worker lain.
+    Kalau sesi rusak, worker berhenti dan sisa antrean dikerjakan worker lain.
+    """
+    if backend is None:
+        try:
+            backend = open_backend(BACKEND, state.sessions)
+        except Exception:
+            log.exception("[w%d] Login gagal; worker berhenti.", wid)
+            return
+    pending = []
+    try:
+        while True:
+            acct = jobs.get()
+            if acct is None:
+                settle(wid, backend, pending, state)
+                return
+            log.info(f"[w{wid}] [{jobs.label(acct)}] Proses {acct.local}@{acct.domain or '(default)'}")
+            acct.started = time.time()
+            DIAG.note("account", acct.email)
+            METRICS.begin()
+            try:
+                with state.gate:
+                    status = perform(backend, acct)
+            except ServerBusy as e:
+                METRICS.end(acct, UNKNOWN)
+                acct.busy_retries += 1
+                if acct.busy_retries > BUSY_RETRIES or not RETRIES.take():
+                    log.warning("[w%d] %s: server terus sibuk (%s); UNKNOWN.", wid, acct.email, e)
+                    state.record(acct, UNKNOWN)
+                    continue
+                delay = e.retry_after or min(30, 2 ** acct.busy_retries)
+                log.warning("[w%d] Server sibuk (%s); %s diulang setelah %.0fs.", wid, e, acct.email, delay)
+                # jeda dulu baru kembalikan ke antrean: kalau put() duluan, worker lain yang
+                # menganggur langsung mengambilnya lagi dan Retry-After terlewati
+                time.sleep(delay)
+                jobs.put(acct)
+                continue
+            except Exception:
+                log.exception("[w%d] Error saat memproses %s; worker berhenti.", wid, acct.email)
+                METRICS.end(acct, UNKNOWN)
+                state.record(acct, UNKNOWN)
+                settle(wid, backend, pending, state)
+                return
+            METRICS.end(acct, status)
+            for done, st in backend.resolved():
+                state.record(done, st)
+            if status == INFLIGHT:
+                continue
+            if status == PENDING:
+                pending.append(acct)
+                if VERIFY_EVERY and len(pending) >= VERIFY_EVERY:
+                    flush_pending(wid, backend, pending, state)
+                continue
+            state.record(acct, status)
+    finally:
+        log.info("[w%d] Menutup sesi.", wid)
+        backend.close()
+
+# ========= ASYNC ENGINE =========
+class AdaptiveLimiter:
+    """
+    Batas in-flight adaptif (AIMD) untuk host cPanel bersama:
+    - turun setengah kalau server lambat (> slow_s) atau membalas 429/503
+    - naik +1 setelah `limit` request sehat berturut-turut
+    Penurunan dibatasi sekali per `cooldown` detik supaya satu burst tidak menjatuhkan ke 1.
+    """
+    def __init__(self, start: int, max_limit: int, slow_s: float, min_limit=1, cooldown=2.0):
+        self.limit = max(min_limit, min(start, max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.slow_s = slow_s
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.healthy = 0
+        self.last_cut = 0.0
+        self.cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.inflight < self.limit)
+            self.inflight += 1
+
+    async def release(self, latency: float, throttled=False):
+        async with self.cond:
+            self.inflight -= 1
+            now = time.monotonic()
+            if throttled or latency > self.slow_s:
+                self.healthy = 0
+                if now - self.last_cut >= self.cooldown and self.limit > self.min_limit:
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    self.last_cut = now
+                    METRICS.incr("limiter_backoff")
+                    log.info("Limiter turun -> %d (%s, %.2fs)", self.limit,
+                             "throttled" if throttled else "lambat", latency)
             else:
-                # coba deteksi duplikat
-                dup_xp = "//*[contains(., 'already exists') or contains(., 'sudah ada') or contains(., 'duplicate')]"
-                with try_all_frames(driver):
-                    if driver.find_elements(By.XPATH, dup_xp):
-                        dupes += 1
-                    else:
-                        unknowns += 1
+                self.healthy += 1
+                if self.healthy >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self.healthy = 0
+                    log.info("Limiter naik -> %d", self.limit)
+            self.cond.notify_all()
+
+def _timed_create(backend, acct: Account) -> str:
+    """
+    Dijalankan di thread executor: span metrics per akun tetap tercatat di thread yang sama.
+    Ring diag juga milik thread ini, jadi akun UNKNOWN di-persist di sini (record() jalan di event loop).
+    """
+    acct.started = time.time()
+    DIAG.note("account", acct.email)
+    METRICS.begin()
+    status = UNKNOWN
+    try:
+        status = perform(backend, acct)
+        return status
+    except ServerBusy:
+        status = None  # diulang engine; bukan kegagalan akun
+        raise
+    finally:
+        METRICS.end(acct, status or UNKNOWN)
+        if status == UNKNOWN:
+            DIAG.persist(acct.email)
+
+async def run_async(jobs: JobSource, state: BatchState, first):
+    """
+    Engine asyncio: akun diambil dari antrean oleh ASYNC_MAX consumer, tapi yang benar-benar
+    in-flight dibatasi AdaptiveLimiter. Panggilan WebDriver/HTTP yang blocking jalan di thread pool.
+    Backend yang `shareable` (UAPI: satu sesi HTTP ber-pool) dipakai bersama; selenium
+    dibuka lazily, satu browser per slot in-flight.
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=ASYNC_MAX + 2, thread_name_prefix="async"))
+    limiter = AdaptiveLimiter(ASYNC_START, ASYNC_MAX, ASYNC_SLOW_MS / 1000.0)
+    idle = asyncio.Queue()
+    idle.put_nowait(first)
+    opened = [first]
+    pending = []
+
+    async def checkout():
+        if getattr(first, "shareable", False):
+            return first
+        if idle.empty() and len(opened) < limiter.limit:
+            opened.append(None)  # reservasi slot sebelum await
+            try:
+                backend = await asyncio.to_thread(open_backend, BACKEND, state.sessions)
+            except Exception:
+                opened.remove(None)
+                raise
+            opened[opened.index(None)] = backend
+            return backend
+        return await idle.get()
+
+    def checkin(backend):
+        if not getattr(backend, "shareable", False):
+            idle.put_nowait(backend)
+
+    def record_all(done):
+        for acct, st in done:
+            state.record(acct, st)
+
+    async def consumer(cid: int):
+        while True:
+            # get() bisa mencatat SKIPPED (journal fsync) & record() menulis hasil: jangan di event loop
+            acct = await asyncio.to_thread(jobs.get)
+            if acct is None:
+                return
+            await limiter.acquire()
+            throttled = False
+            try:
+                backend = await checkout()
+            except Exception:
+                log.exception("[a%d] Gagal membuka sesi baru; akun dikembalikan ke antrean.", cid)
+                jobs.put(acct)
+                await limiter.release(0.0, throttled=True)
+                return
+            # diukur setelah checkout: membuka browser bukan latency server
+            t = time.perf_counter()
+            retry_delay = None
+            try:
+                log.info(f"[a{cid}] [{jobs.label(acct)}] Proses {acct.local}@{acct.domain or '(default)'} "
+                         f"(limit={limiter.limit})")
+                status = await asyncio.to_thread(_timed_create, backend, acct)
+            except ServerBusy as e:
+                throttled, status = True, None
+                acct.busy_retries += 1
+                if acct.busy_retries > BUSY_RETRIES or not RETRIES.take():
+                    log.warning("[a%d] %s: server terus sibuk (%s); UNKNOWN.", cid, acct.email, e)
+                    status = UNKNOWN
+                else:
+                    retry_delay = e.retry_after or min(30, 2 ** acct.busy_retries)
+            except Exception:
+                log.exception("[a%d] Error saat memproses %s.", cid, acct.email)
+                status = UNKNOWN
+            finally:
+                elapsed = time.perf_counter() - t
+                await asyncio.to_thread(record_all, backend.resolved())
+                checkin(backend)
+                await limiter.release(elapsed, throttled)
+            if retry_delay is not None:
+                # slot & sesi sudah dilepas; jeda hanya menahan akun ini
+                await asyncio.sleep(retry_delay)
+                jobs.put(acct)
+            elif status == PENDING:
+                pending.append(acct)
+            elif status and status != INFLIGHT:
+                await asyncio.to_thread(state.record, acct, status)
+
+    try:
+        await asyncio.gather(*(consumer(c) for c in range(1, ASYNC_MAX + 1)))
+        for backend in opened:
+            if backend is not None and backend is not first:
+                await asyncio.to_thread(settle, 0, backend, [], state)
+        await asyncio.to_thread(settle, 0, first, pending, state)
+    finally:
+        for backend in opened:
+            if backend is not None:
+                await asyncio.to_thread(backend.close)
+    log.info("Async selesai: limit akhir=%d, sesi dibuka=%d", limiter.limit, len(opened))
+
+# ========= MULTI TARGET =========
+@dataclass
+class Target:
+    """Satu akun cPanel beserta job-nya (entri TARGETS, atau env CPANEL_* kalau TARGETS kosong)."""
+    name: str
+    url: str
+    user: str
+    password: str
+    domain: str
+    prefix: str
+    start: int
+    count: int
+    quota_mb: int
+    manifest: str
+    workers: int
+
+    @property
+    def host(self) -> str:
+        return (urlsplit(self.url).hostname or self.url).lower()
 
-        log.info("SUMMARY: OK=%s, DUPLICATE=%s, UNKNOWN=%s", successes, dupes, unknowns)
-        print(f"\nSUMMARY: OK={successes}, DUPLICATE={dupes}, UNKNOWN={unknowns}")
+    def accounts(self):
+        if self.manifest:
+            return group_by_domain(iter_manifest(self.manifest, self.domain), MANIFEST_CHUNK)
+        return iter_accounts(self.prefix, self.domain, self.start, self.count, self.quota_mb)
 
+    def sessions(self) -> SessionManager:
+        """Login sendiri per target; cache sesi di file terpisah (SESSION_CACHE + nama target)."""
+        return SessionManager(self.url, self.user, self.password, cache_path=self.path_for(SESSION_CACHE))
+
+    def path_for(self, path: str) -> str:
+        """File turunan per target: /x/session.json -> /x/session_<nama>.json (kosong tetap kosong)."""
+        if not path:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}_{re.sub(r'[^A-Za-z0-9_.-]', '_', self.name)}{ext}"
+
+def env_target() -> Target:
+    return Target(CPANEL_USER or "default", CPANEL_URL, CPANEL_USER, CPANEL_PASS, DOMAIN, EMAIL_PREFIX,
+                  START, COUNT, QUOTA_MB, MANIFEST, WORKERS)
+
+def load_targets(path: str) -> list:
+    """
+    TARGETS: list JSON atau JSONL, satu objek per akun cPanel:
+    {"name", "url", "user", "password" | "password_env", "domain", "prefix", "start", "count",
+     "quota_mb", "manifest", "workers"}; field yang tidak diisi mengikuti env.
+    password_env = nama env var berisi password, supaya file target tidak memuat kredensial.
+    """
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    if text.lstrip().startswith("["):
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    targets, names = [], set()
+    for n, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise ValueError(f"entri {n}: harus objek JSON, bukan {type(row).__name__}: {str(row)[:60]!r}")
+        password = row.get("password") or os.getenv(row.get("password_env") or "", "")
+        if not row.get("url") or not row.get("user") or not password:
+            raise ValueError(f"entri {n}: url, user dan password/password_env wajib diisi")
+        name = str(row.get("name") or f"{row['user']}@{urlsplit(row['url']).hostname}")
+        if name in names:
+            raise ValueError(f"entri {n}: nama target dobel: {name}")
+        names.add(name)
+        targets.append(Target(
+            name=name,
+            url=row["url"],
+            user=row["user"],
+            password=password,
+            domain=row.get("domain", DOMAIN),
+            prefix=row.get("prefix", EMAIL_PREFIX),
+            start=int(row.get("start", START)),
+            count=int(row.get("count", COUNT)),
+            quota_mb=int(row.get("quota_mb", QUOTA_MB)),
+            manifest=row.get("manifest", ""),
+            workers=max(1, int(row.get("workers", WORKERS))),
+        ))
+    if not targets:
+        raise ValueError("tidak ada target")
+    return targets
+
+def prepare_target(t: Target, history: dict, journal: Journal, results: ResultSink, gate):
+    """Login + preflight satu target. Return (state, jobs, backend pertama); backend None = login gagal."""
+    state = BatchState(journal, t.sessions(), results, gate)
+    try:
+        first = open_backend(BACKEND, state.sessions)
+    except Exception:
+        log.exception("[%s] Login gagal; semua akun target ini tidak diproses.", t.name)
+        return state, JobSource(t.accounts()), None
+    existing = preflight_existing(first, t.domain, t.manifest)
+    jobs = JobSource(plan_jobs(t.accounts(), existing, history, state),
+                     total=None if t.manifest else t.start + t.count - 1)
+    return state, jobs, first
+
+def run_targets(targets: list, history: dict, journal: Journal, results: ResultSink) -> dict:
+    """
+    Semua target dijalankan bersamaan, dengan executor worker sendiri per host cPanel:
+    - tiap target punya sesi, antrean & counter sendiri, maksimal `workers` sesi paralel
+    - HOST_LIMIT membatasi akun in-flight per host (semua target di host itu; default = `workers`
+      terbesar di antara target host itu); executor host tidak pernah lebih besar dari batas itu,
+      jadi worker tidak menunggu gate sambil memakan slot host lain
+    - POOL_WORKERS (total) dibagi ke host sebanding kebutuhannya, minimal 1 worker per host
+    - di dalam satu host, worker diantrekan bergiliran antar target
+    Return {nama target: BatchState}.
+    """
+    limits = Counter()
+    for t in targets:
+        limits[t.host] = HOST_LIMIT if HOST_LIMIT > 0 else max(limits[t.host], t.workers)
+    gates = {host: threading.BoundedSemaphore(n) for host, n in limits.items()}
+    pool = POOL_WORKERS or sum(t.workers for t in targets)
+    runs = []
+    with ThreadPoolExecutor(max_workers=min(pool, len(targets)), thread_name_prefix="prepare") as ex:
+        prepared = ex.map(lambda t: prepare_target(t, history, journal, results, gates.get(t.host)), targets)
+        for t, (state, jobs, first) in zip(targets, prepared):
+            n = 0
+            if first is not None and jobs.empty():
+                log.info("[%s] Tidak ada akun baru untuk dibuat.", t.name)
+                first.close()
+            elif first is not None:
+                n = t.workers if t.manifest else min(t.workers, t.count)
+            runs.append((t, state, jobs, first, n))
+
+    demand = Counter()
+    for t, state, jobs, first, n in runs:
+        demand[t.host] += n
+    sizes = {host: min(limits[host], d) for host, d in demand.items() if d}
+    if POOL_WORKERS and sizes:
+        total = sum(sizes.values())
+        sizes = {host: max(1, min(n, POOL_WORKERS * n // total)) for host, n in sizes.items()}
+    log.info("Mulai batch multi-target: op=%s, backend=%s, %d target di %d host, worker per host %s, "
+             "batas per host %s", OPERATION, BACKEND, len(targets), len(limits), sizes, dict(limits))
+    executors = {host: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"worker-{host}")
+                 for host, n in sizes.items()}
+    try:
+        futs, wid = [], 0
+        for k in range(max((r[4] for r in runs), default=0)):
+            for t, state, jobs, first, n in runs:
+                if k < n:
+                    wid += 1
+                    log.info("[w%d] -> target %s (%s)", wid, t.name, t.host)
+                    futs.append(executors[t.host].submit(run_worker, wid, jobs, state, first if k == 0 else None))
+        for f in futs:
+            f.result()
+    finally:
+        for ex in executors.values():
+            ex.shutdown(wait=True)
+
+    states = {}
+    for t, state, jobs, first, n in runs:
+        left = jobs.drain()
+        if left:
+            log.error("[%s] %d akun tidak terproses.", t.name, left)
+            state.counts[UNKNOWN] += left
+        states[t.name] = state
+    return states
+
+def summary_line(counts: Counter) -> str:
+    return (f"OK={counts[OK]}, DUPLICATE={counts[DUPLICATE]}, SKIPPED={counts[SKIPPED]}, "
+            f"REJECTED={counts[REJECTED]}, UNKNOWN={counts[UNKNOWN]}")
+
+# ========= PLAN (DRY RUN) =========
+def _last_rate(prefix: str):
+    """(p50 detik per akun, akun/menit) dari metrics.json run terakhir; None kalau belum ada."""
+    try:
+        with open(prefix + ".json", encoding="utf-8") as fh:
+            rep = json.load(fh)
+    except (OSError, ValueError):
+        return None, None
+    p50 = ((rep.get("stages") or {}).get("account_total") or {}).get("p50") or None
+    return p50, rep.get("accounts_per_min") or None
+
+def plan_batch(t: Target, history: dict, plan_file=PLAN_FILE) -> Counter:
+    """
+    Dry run: input yang sama dengan batch (prefix/MANIFEST, journal kalau RESUME), satu kali
+    ambil daftar mailbox + domain + batas akun paket lewat UAPI, lalu tulis rencana per akun ke
+    plan_file (create/skip/konflik) dan estimasi durasi dari metrics run terakhir.
+    Tidak ada form yang dibuka dan tidak ada yang dikirim ke server selain query baca.
+    """
+    sessions = t.sessions() if TARGETS else SessionManager()
+    sess = sessions.get()
+    client = UapiClient(sess.token_base, sess.cookies, sessions=sessions)
+    try:
+        with METRICS.stage("plan_fetch"):
+            existing = client.list_accounts("" if t.manifest else t.domain)
+            try:
+                domains = client.list_domains()
+            except UapiError as e:
+                log.warning("Daftar domain tidak tersedia (%s); cek domain dilewati.", e)
+                domains = None
+            try:
+                used, cap = client.account_limit()
+            except UapiError as e:
+                log.warning("Batas akun paket tidak tersedia (%s); cek kuota dilewati.", e)
+                used, cap = None, None
+    finally:
+        client.close()
+    free = cap - used if cap is not None and used is not None else None
+    log.info("[%s] Plan: %d mailbox ada, %s domain, slot paket %s.", t.name, len(existing),
+             len(domains) if domains is not None else "?", "unlimited" if free is None else f"{free} tersisa")
+
+    act = OPERATION
+    # baris tanpa domain dibuat di domain utama cPanel (sama seperti add_pop/form tanpa domain)
+    default_domain = domains[0] if domains else ""
+    counts, seen = Counter(), set()
+    with open(plan_file, "w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh)
+        w.writerow(["email", "action", "reason"])
+        for acct in t.accounts():
+            domain = (acct.domain or default_domain).lower()
+            email = f"{acct.local}@{domain}".lower() if domain else acct.email.lower()
+            prev = history.get(acct.email.lower())
+            if email in seen:
+                action, reason = "conflict", "duplikat di input"
+            elif domains is not None and domain and domain not in domains:
+                action, reason = "conflict", f"domain {domain} tidak ada di akun cPanel"
+            elif RESUME and prev and prev.get("op", "create") == OPERATION and prev["status"] in FINAL_STATUSES:
+                action, reason = "skip", f"journal: {prev['status']}"
+            elif domain and OPERATION == "create" and email in existing:
+                action, reason = "skip", "sudah ada"
+            elif domain and OPERATION != "create" and email not in existing:
+                action, reason = "skip", "tidak ada"
+            elif OPERATION == "create" and free is not None and counts[act] >= free:
+                action, reason = "conflict", f"melebihi batas akun paket ({cap})"
+            else:
+                # domain tidak bisa ditentukan (daftar domain gagal diambil): anggap akun baru
+                action, reason = act, "" if domain else "domain default UI, keberadaan tidak dicek"
+            seen.add(email)
+            counts[action] += 1
+            w.writerow([acct.email, action, reason])
+            if action == "conflict" and counts["conflict"] <= 20:
+                log.warning("[%s] Konflik: %s (%s)", t.name, acct.email, reason)
+
+    todo = counts[act]
+    p50, per_min = _last_rate(METRICS_PREFIX)
+    if per_min:
+        secs = todo / per_min * 60
+        eta = f"~{secs / 60:.1f} menit / {secs:.0f} detik ({per_min} akun/menit run terakhir)"
+    elif p50:
+        secs = todo * p50 / t.workers
+        eta = f"~{secs / 60:.1f} menit / {secs:.0f} detik (p50 {p50}s/akun, {t.workers} worker)"
+    else:
+        eta = f"tidak tersedia (belum ada {METRICS_PREFIX}.json)"
+    log.info("[%s] PLAN: %s=%d, skip=%d, conflict=%d; estimasi %s. Rincian: %s",
+             t.name, act, todo, counts["skip"], counts["conflict"], eta, plan_file)
+    print(f"\nPLAN [{t.name}]: {act}={todo}, skip={counts['skip']}, conflict={counts['conflict']}\n"
+          f"Estimasi: {eta}\nRincian per akun: {plan_file}")
+    return counts
+
+def run_single(state: BatchState, history: dict):
+    """Satu target dari env (CPANEL_*): engine threads atau async."""
+    counts = state.counts
+    # Login pertama dipakai untuk preflight, lalu diserahkan ke worker 1
+    first = open_backend(BACKEND, state.sessions)
+    existing = preflight_existing(first)
+    jobs = JobSource(plan_jobs(env_target().accounts(), existing, history, state),
+                     total=None if MANIFEST else START + COUNT - 1)
+
+    if jobs.empty():
+        log.info("Tidak ada akun baru untuk dibuat.")
+        first.close()
+    elif ENGINE == "async":
+        log.info("Mulai batch async: op=%s, sumber=%s, backend=%s, in-flight %d..%d",
+                 OPERATION, MANIFEST or "prefix", BACKEND, ASYNC_START, ASYNC_MAX)
+        asyncio.run(run_async(jobs, state, first))
+    else:
+        n = WORKERS if MANIFEST else min(WORKERS, COUNT)
+        log.info("Mulai batch: op=%s, sumber=%s, backend=%s, workers=%d",
+                 OPERATION, MANIFEST or "prefix", BACKEND, n)
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="worker") as ex:
+            futs = [ex.submit(run_worker, 1, jobs, state, first)]
+            futs += [ex.submit(run_worker, w, jobs, state) for w in range(2, n + 1)]
+            for f in futs:
+                f.result()
+
+    # Sisa antrean = semua worker mati sebelum selesai (belum dicoba, tidak masuk journal)
+    left = jobs.drain()
+    if left:
+        log.error("%d akun tidak terproses (semua worker berhenti).", left)
+        counts[UNKNOWN] += left
+
+# ========= MAIN (BATCH) =========
+def main():
+    setup_logging()
+    if not TARGETS and not all([CPANEL_URL, CPANEL_USER, CPANEL_PASS]):
+        log.error("Env CPANEL_URL/CPANEL_USER/CPANEL_PASS wajib diisi.")
+        print("Env CPANEL_URL/CPANEL_USER/CPANEL_PASS wajib diisi.", file=sys.stderr)
+        sys.exit(2)
+    if OPERATION != "create" and OPERATION not in OPERATIONS:
+        log.error("OPERATION tidak dikenal: %s (pilih: create | %s)", OPERATION, " | ".join(OPERATIONS))
+        sys.exit(2)
+    targets = []
+    if TARGETS:
+        try:
+            targets = load_targets(TARGETS)
+        except (OSError, ValueError) as e:
+            log.error("TARGETS tidak valid (%s): %s", TARGETS, e)
+            sys.exit(2)
+        if ENGINE == "async":
+            log.warning("ENGINE=async belum mendukung TARGETS; pakai engine threads.")
+    if PLAN:
+        history = Journal.load(JOURNAL_FILE)
+        if not targets:
+            plan_batch(env_target(), history)
+        for t in targets:
+            try:
+                plan_batch(t, history, t.path_for(PLAN_FILE))
+            except Exception:
+                log.exception("[%s] Plan gagal; target berikutnya tetap direncanakan.", t.name)
+        return
+
+    METRICS.t0 = time.time()
+    DIAG.start()
+    history = Journal.load(JOURNAL_FILE)
+    results = None
+    if RESULTS_FILE:
+        results = ResultSink(RESULTS_FILE, RESULTS_BATCH, RESULTS_FLUSH_SEC, RESULTS_PER_WORKER, RESULTS_KEY)
+    state = BatchState(Journal(JOURNAL_FILE), SessionManager(), results)
+    counts = state.counts
+    per_target = {}
+
+    try:
+        if targets:
+            per_target = run_targets(targets, history, state.journal, results)
+            for st in per_target.values():
+                counts.update(st.counts)
+        else:
+            run_single(state, history)
     except Exception:
         log.exception("Fatal error saat eksekusi.")
         raise
     finally:
-        log.info("Menutup sesi browser.")
-        driver.quit()
+        state.journal.close()
+        if state.results is not None:
+            state.results.close()
+        DIAG.close()
+        try:
+            rep = METRICS.write(METRICS_PREFIX, prom=METRICS_PROM)
+            log.info("Metrics: %s akun/menit, laporan di %s.json", rep["accounts_per_min"], METRICS_PREFIX)
+        except Exception as e:
+            log.warning("Gagal menulis metrics (%s).", e)
+
+    print()
+    for t in targets:
+        line = f"SUMMARY [{t.name}] ({t.host}): {summary_line(per_target[t.name].counts)}"
+        log.info(line)
+        print(line)
+    log.info("SUMMARY: %s", summary_line(counts))
+    print(f"SUMMARY: {summary_line(counts)}")
 
 if __name__ == "__main__":
     main()
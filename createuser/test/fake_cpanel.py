@@ -0,0 +1,444 @@
+"""
+Stand-in lokal cPanel Jupiter untuk benchmark & regression test tanpa akun cPanel asli.
+
+- /login/ (form browser + login_only=1 JSON) -> token cpsessNNNNNNNNNN + cookie cpsession
+- /cpsessNNN/frontend/jupiter/email_accounts/index.html: halaman Email Accounts mini
+  (#/list dan #/create/) dengan ID elemen yang sama dengan yang dipakai createuser.py
+- /cpsessNNN/execute/Email/{add_pop,list_pops,list_mail_domains,delete_pop,passwd_pop,edit_pop_quota}
+  dan /cpsessNNN/execute/StatsBar/get_stats: mock UAPI
+- injeksi latency, HTTP 429 (busy), HTTP 500 dan error UAPI (status=0) per request
+- policy password minimum & batas jumlah akun paket (untuk uji klasifikasi kegagalan)
+
+Jalankan mandiri:
+    python test/fake_cpanel.py --port 8088 --latency-ms 50 --busy-rate 0.05
+atau dipakai in-process oleh bench.py (FakeCpanel(...).start()).
+"""
+import argparse, json, random, re, secrets, threading, time, urllib.parse
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# ========= HALAMAN =========
+LOGIN_HTML = """<!doctype html>
+<html><head><title>cPanel Login</title></head><body>
+<form id="login_form" method="post" action="/login/">
+  <input id="user" name="user" autocomplete="username">
+  <input id="pass" name="pass" type="password" autocomplete="current-password">
+  <button id="login_submit" type="submit">Log in</button>
+</form>
+<div id="login-status">%(message)s</div>
+</body></html>
+"""
+
+HOME_HTML = """<!doctype html>
+<html><head><title>cPanel - Tools</title></head><body>
+<div id="viewContent"><a href="email_accounts/index.html#/list">Email Accounts</a></div>
+</body></html>
+"""
+
+# Tanpa Angular: readiness di createuser.py jatuh ke cek DOM saja (sama dengan halaman non-Angular).
+# Loading panel & validator tombol Create disimulasikan supaya jalur tunggu tetap teruji.
+APP_HTML = """<!doctype html>
+<html><head><title>Email Accounts</title>
+<style>.hidden{display:none}</style></head><body>
+<cp-alert-list id="alerts"></cp-alert-list>
+<div id="viewContent"></div>
+<script>
+var PAGE = {mailDomains: %(domains)s};
+var CFG = %(cfg)s;
+var API = location.pathname.replace(/frontend\\/.*$/, 'execute/Email/');
+var view = document.getElementById('viewContent');
+
+function esc(s) { var d = document.createElement('div'); d.textContent = s; return d.innerHTML; }
+function alertMsg(text) { document.getElementById('alerts').innerText = text; }
+function api(func, params) {
+    return fetch(API + func, {method: 'POST', body: new URLSearchParams(params || {}), credentials: 'same-origin'})
+        .then(function (r) {
+            if (r.status === 401 || r.status === 403) { location.href = '/login/'; throw new Error('logged out'); }
+            return r.json().catch(function () { return {status: 0, errors: ['HTTP ' + r.status]}; });
+        });
+}
+
+function renderList() {
+    view.innerHTML =
+        '<button id="btnCreateEmailAccount" type="button">+ Create</button>' +
+        '<table id="accounts_table"><tbody id="accounts_table_body"></tbody></table>';
+    document.getElementById('btnCreateEmailAccount').onclick = function () { location.hash = '#/create/'; };
+    api('list_pops').then(function (res) {
+        document.getElementById('accounts_table_body').innerHTML = (res.data || []).map(function (row) {
+            return '<tr><td class="name-column"><span class="account-name">' + esc(row.email) + '</span></td></tr>';
+        }).join('');
+    });
+}
+
+function renderCreate() {
+    var many = PAGE.mailDomains.length > 1;
+    view.innerHTML =
+        '<div id="createLoadingPanel">Loading…</div>' +
+        '<div id="createForm" class="hidden">' +
+        '<input id="txtUserName" autocomplete="off">' +
+        (many ? '<select id="ddlDomain">' + PAGE.mailDomains.map(function (d) {
+            return '<option value="' + esc(d) + '">' + esc(d) + '</option>'; }).join('') + '</select>' : '') +
+        '<span id="spanAddEmailAccountDomains"><span class="domain-text">@' + esc(PAGE.mailDomains[0]) + '</span></span>' +
+        '<password><input id="txtEmailPassword" type="password" autocomplete="new-password"></password>' +
+        '<button id="btnShowOptionalSettings" type="button">Edit Settings</button>' +
+        '<div id="optionalHolder"></div>' +
+        '<label><input id="send_welcome_email" type="checkbox" checked> Send welcome email</label>' +
+        '<label><input id="stay" type="checkbox"> Stay on this page</label>' +
+        '<button id="btnCreateEmailAccount" type="button" disabled>+ Create</button>' +
+        '</div>';
+    var user = document.getElementById('txtUserName');
+    var pwd = document.getElementById('txtEmailPassword');
+    var btn = document.getElementById('btnCreateEmailAccount');
+    var ddl = document.getElementById('ddlDomain');
+    var busy = false;
+
+    function validate() { btn.disabled = busy || !user.value.trim() || !pwd.value; }
+    user.addEventListener('input', validate);
+    pwd.addEventListener('input', validate);
+    if (ddl) ddl.addEventListener('change', function () {
+        document.querySelector('#spanAddEmailAccountDomains .domain-text').innerText = '@' + ddl.value;
+    });
+    document.getElementById('btnShowOptionalSettings').onclick = function () {
+        if (document.getElementById('optionalSettingsDiv')) return;
+        document.getElementById('optionalHolder').innerHTML =
+            '<div id="optionalSettingsDiv">' +
+            '<label><input id="userDefinedQuota" name="quotaType" type="radio" checked> MB</label>' +
+            '<input id="quota" value="1024">' +
+            '<label><input id="unlimitedQuota" name="quotaType" type="radio"> Unlimited</label>' +
+            '</div>';
+    };
+
+    btn.onclick = function () {
+        if (btn.disabled) return;
+        busy = true;
+        validate();
+        var panel = document.getElementById('createLoadingPanel');
+        panel.classList.remove('hidden');
+        var limited = document.getElementById('userDefinedQuota');
+        var params = {
+            email: user.value.trim(),
+            domain: ddl ? ddl.value : PAGE.mailDomains[0],
+            password: pwd.value,
+            quota: limited && limited.checked ? document.getElementById('quota').value : 0,
+            send_welcome_email: document.getElementById('send_welcome_email').checked ? 1 : 0
+        };
+        api('add_pop', params).then(function (res) {
+            if (res.status) {
+                alertMsg('Success: The account “' + params.email + '@' + params.domain + '” was created.');
+                if (document.getElementById('stay').checked) { user.value = ''; pwd.value = ''; }
+                else location.hash = '#/list';
+            } else {
+                alertMsg('Error: ' + (res.errors || []).join(' '));
+            }
+        }).catch(function (e) {
+            alertMsg('Error: ' + e);
+        }).then(function () {
+            busy = false;
+            panel.classList.add('hidden');
+            if (document.body.contains(btn)) validate();
+        });
+    };
+
+    // Simulasi load route (template + data domain) seperti Jupiter
+    setTimeout(function () {
+        document.getElementById('createLoadingPanel').classList.add('hidden');
+        document.getElementById('createForm').classList.remove('hidden');
+    }, CFG.form_delay_ms);
+}
+
+function route() {
+    if (/^#\\/create/.test(location.hash)) renderCreate(); else renderList();
+}
+window.addEventListener('hashchange', route);
+route();
+</script>
+</body></html>
+"""
+
+# ========= SERVER =========
+class FakeCpanel:
+    """
+    Server cPanel palsu (stdlib, multi-thread). Semua state di memori:
+    accounts (email -> quota), sesi (token -> cookie), dan statistik request.
+    Konfigurasi injeksi bisa diubah saat berjalan (atribut biasa).
+    """
+    def __init__(self, host="127.0.0.1", port=0, user="bench", password="bench",
+                 domains=("example.test",), latency_ms=0.0, jitter_ms=0.0,
+                 busy_rate=0.0, error_rate=0.0, fail_rate=0.0, form_delay_ms=150,
+                 max_accounts=0, min_password=8):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.domains = list(domains)
+        self.latency_ms = latency_ms    # jeda tiap panggilan UAPI
+        self.jitter_ms = jitter_ms      # + acak 0..jitter_ms
+        self.busy_rate = busy_rate      # peluang HTTP 429 (Retry-After: 1)
+        self.error_rate = error_rate    # peluang HTTP 500
+        self.fail_rate = fail_rate      # peluang add_pop status=0 (error UAPI)
+        self.form_delay_ms = form_delay_ms
+        self.max_accounts = max_accounts  # 0 = tanpa batas paket
+        self.min_password = min_password  # password lebih pendek ditolak "too weak"
+        self.accounts = {}
+        self.sessions = {}
+        self.stats = Counter()
+        self.inflight = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    # --- lifecycle ---
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), _handler_for(self))
+        self.server.daemon_threads = True
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, name="fake-cpanel", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def url(self, host=None) -> str:
+        return f"http://{host or self.host}:{self.port}"
+
+    def reset(self):
+        """Kosongkan akun, sesi & statistik (antar skenario benchmark)."""
+        with self.lock:
+            self.accounts.clear()
+            self.sessions.clear()
+            self.stats.clear()
+
+    def expire_sessions(self):
+        """Paksa semua token kedaluwarsa (uji re-auth di tengah batch)."""
+        with self.lock:
+            self.sessions.clear()
+
+    # --- sesi ---
+    def login(self, user: str, password: str):
+        if user != self.user or password != self.password:
+            return None
+        token = "cpsess%010d" % secrets.randbelow(10 ** 10)
+        cookie = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[token] = cookie
+            self.stats["login"] += 1
+        return token, cookie
+
+    def authorized(self, token: str, cookie: str) -> bool:
+        with self.lock:
+            return bool(token) and self.sessions.get(token) == cookie
+
+    # --- UAPI ---
+    def uapi(self, func: str, q: dict):
+        """Return (http_status, payload|None, headers)."""
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000.0)
+        r = random.random()
+        if r < self.busy_rate:
+            self.stats["http_429"] += 1
+            return 429, None, {"Retry-After": "1"}
+        if r < self.busy_rate + self.error_rate:
+            self.stats["http_500"] += 1
+            return 500, None, {}
+        handler = getattr(self, "_uapi_" + func, None)
+        if handler is None:
+            return 200, {"status": 0, "errors": [f"Function {func} tidak ada di fake server."]}, {}
+        return 200, handler(q), {}
+
+    def _uapi_add_pop(self, q):
+        local = (q.get("email") or "").strip().lower()
+        domain = (q.get("domain") or self.domains[0]).lower()
+        if "@" in local:
+            local, domain = local.split("@", 1)
+        if not local or not q.get("password"):
+            return {"status": 0, "errors": ["You must specify an email account name and password."]}
+        if domain not in self.domains:
+            return {"status": 0, "errors": [f"The domain “{domain}” does not exist."]}
+        if len(q["password"]) < self.min_password:
+            return {"status": 0, "errors": ["The password you selected cannot be used because it is too weak "
+                                            "and would be too easy to guess."]}
+        if random.random() < self.fail_rate:
+            self.stats["add_pop_fail"] += 1
+            return {"status": 0, "errors": ["Injected failure (fake_cpanel)."]}
+        email = f"{local}@{domain}"
+        with self.lock:
+            if email in self.accounts:
+                return {"status": 0, "errors": [f"The account {email} already exists!"]}
+            if self.max_accounts and len(self.accounts) >= self.max_accounts:
+                return {"status": 0, "errors": ["You have exceeded the maximum allowed email accounts "
+                                                f"({self.max_accounts})."]}
+            self.accounts[email] = {"quota": int(q.get("quota") or 0)}
+        return {"status": 1, "errors": None, "data": None}
+
+    def _target(self, q):
+        local = (q.get("email") or "").strip().lower()
+        domain = (q.get("domain") or self.domains[0]).lower()
+        return local if "@" in local else f"{local}@{domain}"
+
+    def _uapi_delete_pop(self, q):
+        email = self._target(q)
+        with self.lock:
+            if self.accounts.pop(email, None) is None:
+                return {"status": 0, "errors": [f"The account {email} does not exist."]}
+        return {"status": 1, "errors": None, "data": None}
+
+    def _uapi_passwd_pop(self, q):
+        email = self._target(q)
+        if len(q.get("password") or "") < self.min_password:
+            return {"status": 0, "errors": ["The password you selected cannot be used because it is too weak "
+                                            "and would be too easy to guess."]}
+        with self.lock:
+            if email not in self.accounts:
+                return {"status": 0, "errors": [f"The account {email} does not exist."]}
+        return {"status": 1, "errors": None, "data": None}
+
+    def _uapi_edit_pop_quota(self, q):
+        email = self._target(q)
+        with self.lock:
+            if email not in self.accounts:
+                return {"status": 0, "errors": [f"The account {email} does not exist."]}
+            self.accounts[email]["quota"] = int(q.get("quota") or 0)
+        return {"status": 1, "errors": None, "data": None}
+
+    def _uapi_list_pops(self, q):
+        pattern = re.compile(q["regex"], re.I) if q.get("regex") else None
+        with self.lock:
+            rows = [{"email": e, "login": e} for e in sorted(self.accounts) if not pattern or pattern.search(e)]
+        if not q.get("api.paginate"):
+            return {"status": 1, "data": rows}
+        size = max(1, int(q.get("api.paginate_size") or 1000))
+        start = max(1, int(q.get("api.paginate_start") or 1))
+        pages = max(1, -(-len(rows) // size))
+        return {"status": 1, "data": rows[start - 1:start - 1 + size],
+                "metadata": {"paginate": {"total_pages": pages, "total_results": len(rows)}}}
+
+    def _uapi_list_mail_domains(self, q):
+        return {"status": 1, "data": [{"domain": d} for d in self.domains]}
+
+    def _uapi_get_stats(self, q):
+        """StatsBar::get_stats display=emailaccounts (batas paket)."""
+        with self.lock:
+            n = len(self.accounts)
+        cap = str(self.max_accounts) if self.max_accounts else "unlimited"
+        return {"status": 1, "data": [{"id": "email_accounts", "name": "emailaccounts",
+                                       "count": str(n), "_count": str(n), "max": cap, "_max": cap}]}
+
+def _handler_for(fake: FakeCpanel):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # header & body ditulis terpisah; tanpa ini ada jeda delayed-ACK ~40ms
+
+        def log_message(self, *a):
+            pass
+
+        def _send(self, status, body, ctype="text/html; charset=utf-8", headers=None):
+            data = body.encode("utf-8") if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json(self, status, payload, headers=None):
+            self._send(status, json.dumps(payload), "application/json", headers)
+
+        def _form(self) -> dict:
+            n = int(self.headers.get("Content-Length") or 0)
+            return dict(urllib.parse.parse_qsl(self.rfile.read(n).decode("utf-8"))) if n else {}
+
+        def _session(self):
+            m = re.match(r"^/(cpsess\d+)/", self.path)
+            jar = dict(p.strip().split("=", 1) for p in (self.headers.get("Cookie") or "").split(";") if "=" in p)
+            token = m.group(1) if m else ""
+            return token if fake.authorized(token, jar.get("cpsession", "")) else None
+
+        def do_GET(self):
+            path = urllib.parse.urlsplit(self.path).path
+            if path in ("/", "/login", "/login/"):
+                return self._send(200, LOGIN_HTML % {"message": ""})
+            if not path.startswith("/cpsess"):
+                return self._send(404, "not found", "text/plain")
+            if self._session() is None:
+                return self._send(302, "", headers={"Location": "/login/"})
+            if path.endswith("/email_accounts/index.html"):
+                cfg = {"form_delay_ms": fake.form_delay_ms}
+                return self._send(200, APP_HTML % {"domains": json.dumps(fake.domains), "cfg": json.dumps(cfg)})
+            if path.endswith("/frontend/jupiter/index.html"):
+                return self._send(200, HOME_HTML)
+            return self._send(404, "not found", "text/plain")
+
+        def do_POST(self):
+            parts = urllib.parse.urlsplit(self.path)
+            q = self._form()
+            if parts.path in ("/login", "/login/"):
+                return self._login(parts, q)
+            m = re.match(r"^/cpsess\d+/execute/(\w+)/(\w+)$", parts.path)
+            if not m:
+                return self._send(404, "not found", "text/plain")
+            if self._session() is None:
+                fake.stats["http_401"] += 1
+                return self._send(401, LOGIN_HTML % {"message": "Sesi kedaluwarsa."})
+            with fake.lock:
+                fake.inflight += 1
+                fake.stats["peak_inflight"] = max(fake.stats["peak_inflight"], fake.inflight)
+                fake.stats[f"{m.group(1)}::{m.group(2)}"] += 1
+            try:
+                status, payload, headers = fake.uapi(m.group(2), q)
+            finally:
+                with fake.lock:
+                    fake.inflight -= 1
+            if payload is None:
+                return self._send(status, "busy" if status == 429 else "error", "text/plain", headers)
+            return self._json(status, payload, headers)
+
+        def _login(self, parts, q):
+            res = fake.login(q.get("user", ""), q.get("pass", ""))
+            json_only = "login_only=1" in parts.query
+            if res is None:
+                if json_only:
+                    return self._json(200, {"status": 0, "message": "invalid_login"})
+                return self._send(401, LOGIN_HTML % {"message": "The login is invalid."})
+            token, cookie = res
+            headers = {"Set-Cookie": f"cpsession={cookie}; path=/; HttpOnly"}
+            home = f"/{token}/frontend/jupiter/index.html"
+            if json_only:
+                return self._json(200, {"status": 1, "security_token": "/" + token, "redirect": home}, headers)
+            headers["Location"] = home
+            return self._send(302, "", headers=headers)
+
+    return Handler
+
+# ========= CLI =========
+def main():
+    ap = argparse.ArgumentParser(description="Fake cPanel Jupiter (Email Accounts + UAPI) untuk benchmark lokal.")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8088)
+    ap.add_argument("--user", default="bench")
+    ap.add_argument("--password", default="bench")
+    ap.add_argument("--domains", default="example.test", help="dipisah koma")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--busy-rate", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--form-delay-ms", type=int, default=150)
+    ap.add_argument("--max-accounts", type=int, default=0)
+    ap.add_argument("--min-password", type=int, default=8)
+    a = ap.parse_args()
+    fake = FakeCpanel(a.host, a.port, a.user, a.password, a.domains.split(","), a.latency_ms, a.jitter_ms,
+                      a.busy_rate, a.error_rate, a.fail_rate, a.form_delay_ms,
+                      a.max_accounts, a.min_password).start()
+    print(f"Fake cPanel jalan di {fake.url()} (user={a.user}). Ctrl+C untuk berhenti.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()